@@ -0,0 +1,56 @@
+import hashlib
+from functools import wraps
+
+import redis
+from fastapi.responses import Response
+
+from config import REDIS_URL
+
+# 同步客户端直接跑在事件循环上, 超时必须收紧: Redis 失联时
+# 宁可立刻走 RedisError 降级路径, 也不能让整个循环等 TCP 超时
+redis_client = redis.Redis.from_url(
+    REDIS_URL, socket_connect_timeout=0.2, socket_timeout=0.5
+)
+
+
+def cached(prefix, ttl=30):
+    """按查询参数缓存 GET 接口的 JSON 响应体"""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            # 只取标量参数参与 key, 跳过 Depends 注入的会话等对象
+            params = sorted(
+                (name, value)
+                for name, value in kwargs.items()
+                if isinstance(value, (str, int, float, bool, type(None)))
+            )
+            digest = hashlib.md5(repr(params).encode()).hexdigest()
+            key = f"{prefix}:{func.__name__}:{digest}"
+            try:
+                hit = redis_client.get(key)
+            except redis.RedisError:
+                hit = None
+            if hit is not None:
+                return Response(content=hit, media_type="application/json")
+            response = await func(*args, **kwargs)
+            if response.status_code == 200:
+                try:
+                    redis_client.setex(key, ttl, response.body)
+                except redis.RedisError:
+                    pass
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(prefix):
+    """写接口变更数据后按前缀清理缓存"""
+    try:
+        keys = list(redis_client.scan_iter(f"{prefix}:*"))
+        if keys:
+            redis_client.delete(*keys)
+    except redis.RedisError:
+        pass
@@ -0,0 +1,20 @@
+import os
+
+# 数据库连接,生产环境通过环境变量指定 PostgreSQL 地址
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./grain_master.db")
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", "sqlite+aiosqlite:///./grain_master.db"
+)
+
+# 部署在 PgBouncer 等外部连接池后面时置 1, 应用侧禁用自己的池,
+# 避免双层池化 (两边都攒空闲连接, 超时/上限互相打架)
+SQLALCHEMY_NULLPOOL = os.getenv("SQLALCHEMY_NULLPOOL") == "1"
+
+# Redis 缓存
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# 上传文件保存目录
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./upload")
+IMAGE_DIR = os.path.join(UPLOAD_DIR, "image")
+VIDEO_DIR = os.path.join(UPLOAD_DIR, "video")
+FILE_DIR = os.path.join(UPLOAD_DIR, "file")
@@ -0,0 +1,12 @@
+from schema.database import SessionLocal
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        # FastAPI 在任意线程池线程里跑同步依赖的 setup/teardown,
+        # scoped_session 的线程本地注册表对不上号, remove() 可能
+        # 漏关本请求的会话甚至误关别的请求; 直接关拿到的这个会话
+        db.close()
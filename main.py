@@ -0,0 +1,60 @@
+import logging
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import SQLAlchemyError
+
+from routers.plan import plan_router
+from routers.plant import plant_router
+from routers.plant_plan import plant_plan_router
+from routers.privilege import privilege_router
+from routers.segment import segment_router
+from schema.common import InvalidCursorError
+from schema.database import Base, engine
+from schema.views import create_client_privilege_mv
+
+app = FastAPI(title="GrainMaster", description="粮油系统后端")
+
+logger = logging.getLogger("grainmaster")
+
+
+# 统一异常出口: 各接口不再逐个包 try/except, 异常时会话上下文管理器
+# 正常回滚, 连接干净归还连接池
+@app.exception_handler(SQLAlchemyError)
+async def handle_sqlalchemy_error(request, exc):
+    logger.exception("数据库异常: %s %s", request.method, request.url.path)
+    return ORJSONResponse(
+        status_code=500, content={"code": 1, "message": "数据库异常"}
+    )
+
+
+@app.exception_handler(InvalidCursorError)
+async def handle_invalid_cursor(request, exc):
+    return ORJSONResponse(
+        status_code=200, content={"code": 1, "message": "无效的游标"}
+    )
+
+
+@app.exception_handler(Exception)
+async def handle_unexpected_error(request, exc):
+    logger.exception("未处理异常: %s %s", request.method, request.url.path)
+    return ORJSONResponse(
+        status_code=500, content={"code": 1, "message": "服务器内部错误"}
+    )
+
+app.include_router(plan_router, prefix="/plan", tags=["计划管理"])
+app.include_router(plant_router, prefix="/plant", tags=["种植管理"])
+app.include_router(segment_router, prefix="/segment", tags=["环节计划"])
+app.include_router(plant_plan_router, prefix="/plant_plan", tags=["种植计划管理"])
+app.include_router(privilege_router, prefix="/privilege", tags=["权益管理"])
+
+
+@app.on_event("startup")
+def init_tables():
+    Base.metadata.create_all(bind=engine)
+    create_client_privilege_mv()
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
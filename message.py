@@ -0,0 +1,72 @@
+from schema.database import AsyncSessionLocal, SessionLocal
+from schema.tables import Message
+
+
+def add_messages_bulk(receiver_ids, title, content, details=None, message_type=None):
+    """后台批量写通知: 一条 executemany INSERT 覆盖全部接收人"""
+    if not receiver_ids:
+        return
+    with SessionLocal() as db:
+        db.execute(
+            Message.__table__.insert(),
+            [
+                {
+                    "receiver_id": receiver_id,
+                    "title": title,
+                    "content": content,
+                    "details": details,
+                    "message_type": message_type,
+                }
+                for receiver_id in receiver_ids
+            ],
+        )
+        db.commit()
+
+
+def add_message(db, receiver_id, title, content, details=None, message_type=None):
+    """给单个客户写入一条站内消息"""
+    message = Message(
+        receiver_id=receiver_id,
+        title=title,
+        content=content,
+        details=details,
+        message_type=message_type,
+    )
+    db.add(message)
+    db.commit()
+
+
+async def add_message_async(receiver_id, title, content, details=None, message_type=None):
+    """异步写入一条站内消息"""
+    async with AsyncSessionLocal() as db:
+        db.add(
+            Message(
+                receiver_id=receiver_id,
+                title=title,
+                content=content,
+                details=details,
+                message_type=message_type,
+            )
+        )
+        await db.commit()
+
+
+async def add_messages_bulk_async(receiver_ids, title, content, details=None, message_type=None):
+    """异步批量写通知: 一条 executemany INSERT 覆盖全部接收人"""
+    if not receiver_ids:
+        return
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            Message.__table__.insert(),
+            [
+                {
+                    "receiver_id": receiver_id,
+                    "title": title,
+                    "content": content,
+                    "details": details,
+                    "message_type": message_type,
+                }
+                for receiver_id in receiver_ids
+            ],
+        )
+        await db.commit()
@@ -0,0 +1,141 @@
+from typing import Optional
+
+from fastapi import APIRouter, Body, Depends, Query
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.orm import Session
+
+from dependencies import get_db
+from schema.common import PlanSchema, page_with_order
+from schema.tables import Location, Plan
+
+plan_router = APIRouter()
+
+# /get_plans 默认参数命中率最高, 预编译语句 + TypeAdapter 走快路径
+_HOT_STMT = (
+    select(Plan)
+    .order_by(Plan.id.desc())
+    .limit(bindparam("lim"))
+    .offset(bindparam("off"))
+)
+_HOT_COUNT_STMT = select(func.count()).select_from(Plan)
+_HOT_ADAPTER = TypeAdapter(list[PlanSchema])
+
+# 一条语句完成"基地查询 + 重复校验 + 插入", 只走一次数据库
+_ADD_PLAN_SQL = text(
+    """
+    WITH loc AS (SELECT id FROM location WHERE name = :location),
+    dup AS (
+        SELECT 1 FROM plan
+        WHERE year = :year AND batch = :batch
+          AND location_id = (SELECT id FROM loc)
+    )
+    INSERT INTO plan (year, batch, location_id, total_material, create_people)
+    SELECT :year, :batch, (SELECT id FROM loc), :total_material, :create_people
+    WHERE EXISTS (SELECT 1 FROM loc) AND NOT EXISTS (SELECT 1 FROM dup)
+    RETURNING id
+    """
+)
+
+
+@plan_router.post("/add_plan", summary="添加种植计划")
+async def add_plan(
+    year: int = Body(...),
+    batch: int = Body(...),
+    location: str = Body(...),
+    total_material: Optional[float] = Body(None),
+    create_people: Optional[str] = Body(None),
+    db: Session = Depends(get_db),
+):
+    plan_id = db.execute(
+        _ADD_PLAN_SQL,
+        {
+            "year": year,
+            "batch": batch,
+            "location": location,
+            "total_material": total_material,
+            "create_people": create_people,
+        },
+    ).scalar()
+    if plan_id is None:
+        # 冷路径才需要区分失败原因
+        exist = db.execute(
+            text("SELECT id FROM location WHERE name = :name"), {"name": location}
+        ).scalar()
+        if exist is None:
+            return JSONResponse(
+                status_code=200, content={"code": 1, "message": "基地不存在"}
+            )
+        return JSONResponse(
+            status_code=200, content={"code": 1, "message": "该计划已存在"}
+        )
+    db.commit()
+    return JSONResponse(
+        status_code=200, content={"code": 0, "message": "添加成功", "data": {"id": plan_id}}
+    )
+
+
+@plan_router.get("/get_plans", summary="获取种植计划列表")
+async def get_plans(
+    year: Optional[int] = Query(None),
+    batch: Optional[int] = Query(None),
+    location: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+    db: Session = Depends(get_db),
+):
+    if year is None and batch is None and location is None and order_field == "id" and order == "desc":
+        # 快路径: 跳过 Query 构造和逐行 transform_schema
+        rows = db.execute(
+            _HOT_STMT, {"lim": page_size, "off": (page - 1) * page_size}
+        ).scalars().all()
+        total = db.execute(_HOT_COUNT_STMT).scalar()
+        return ORJSONResponse(
+            status_code=200,
+            content={
+                "code": 0,
+                "message": "查询成功",
+                "data": {
+                    "total": total,
+                    "page": page,
+                    "page_size": page_size,
+                    "data": _HOT_ADAPTER.dump_python(
+                        _HOT_ADAPTER.validate_python(
+                            rows, from_attributes=True
+                        ),
+                        mode="json",
+                    ),
+                },
+            },
+        )
+    query = db.query(Plan)
+    if year is not None:
+        query = query.filter(Plan.year == year)
+    if batch is not None:
+        query = query.filter(Plan.batch == batch)
+    if location is not None:
+        query = query.join(Location, Location.id == Plan.location_id).filter(
+            Location.name == location
+        )
+    data = page_with_order(
+        PlanSchema, query, page=page, page_size=page_size, order_field=order_field, order=order
+    )
+    return JSONResponse(
+        status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+    )
+
+
+@plan_router.delete("/delete_plan", summary="删除种植计划")
+async def delete_plan(
+    plan_id: int = Query(...),
+    db: Session = Depends(get_db),
+):
+    plan = db.query(Plan).filter(Plan.id == plan_id).first()
+    if not plan:
+        return JSONResponse(status_code=200, content={"code": 1, "message": "计划不存在"})
+    db.delete(plan)
+    db.commit()
+    return JSONResponse(status_code=200, content={"code": 0, "message": "删除成功"})
@@ -0,0 +1,511 @@
+import asyncio
+from datetime import datetime
+from itertools import groupby
+from time import monotonic
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, File, Form, Query, UploadFile
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import bindparam, exists, func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from cache import cached, invalidate
+from schema.common import PlanSegmentRelationshipSchema
+from schema.database import AsyncSessionLocal
+from schema.tables import (
+    _IS_PG,
+    Plan,
+    PlanSegmentRelationship,
+    PlantOperate,
+    Segment,
+    SegmentPlan,
+)
+from utils import (
+    delete_image,
+    delete_video,
+    save_image,
+    save_upload_image,
+    save_video,
+)
+
+plant_router = APIRouter()
+
+_PSR_FIELDS = tuple(PlanSegmentRelationshipSchema.model_fields)
+_PSR_ADAPTER = TypeAdapter(list[PlanSegmentRelationshipSchema])
+
+
+class OperateStepItem(BaseModel):
+    operate_name: str
+    index: int
+
+
+class AddPlantSegmentReq(BaseModel):
+    segment_name: str
+    operate_step: list[OperateStepItem]
+
+
+class UpdatePlantSegmentReq(BaseModel):
+    segment_id: int
+    segment_name: str
+
+
+class AddPlantPlanReq(BaseModel):
+    plan_id: int
+    # 客户端一般已从列表接口拿到 segment_id, 直接传 id 省一次查询;
+    # segment_name 仅为旧客户端兼容保留
+    segment_id: Optional[int] = None
+    segment_name: Optional[str] = None
+    operator: str
+    operate_date: datetime
+    remark: Optional[str] = None
+
+
+class SegmentImageReq(BaseModel):
+    plan_id: int
+    segment_id: int
+    image: str
+
+
+class ORJSON(JSONResponse):
+    """orjson 序列化, 跳过 jsonable_encoder 的递归遍历"""
+
+    def render(self, content):
+        return orjson.dumps(content, default=str)
+
+
+@plant_router.get("/get_plant_operate", summary="获取环节操作步骤")
+@cached("plant")
+async def get_plant_operate_api(
+    segment_name: Optional[str] = Query(None),
+    cursor: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    async with AsyncSessionLocal() as db:
+        stmt = select(
+            PlantOperate.id, PlantOperate.name, PlantOperate.index, Segment.name
+        ).join(Segment, Segment.id == PlantOperate.segment_id)
+        if segment_name:
+            stmt = stmt.where(Segment.name == segment_name)
+        if cursor is not None:
+            # 游标分页: WHERE id > cursor, 深翻页成本与页码无关
+            rows = (
+                await db.execute(
+                    stmt.where(PlantOperate.id > cursor)
+                    .order_by(PlantOperate.id)
+                    .limit(page_size + 1)
+                )
+            ).all()
+            next_cursor = rows[page_size - 1][0] if len(rows) > page_size else None
+            rows = sorted(rows[:page_size], key=lambda r: (r[3], r[2]))
+            total = None
+        else:
+            # 兼容旧的页码分页, total 只在第一页统计
+            total = (
+                await db.scalar(select(func.count()).select_from(stmt.subquery()))
+                if page == 1
+                else None
+            )
+            seg_col = Segment.name.desc() if order == "desc" else Segment.name.asc()
+            rows = (
+                await db.execute(
+                    stmt.order_by(seg_col, PlantOperate.index, PlantOperate.id)
+                    .offset((page - 1) * page_size)
+                    .limit(page_size)
+                )
+            ).all()
+            next_cursor = None
+        response = [
+            {
+                "segment_name": seg_name,
+                "operations": [
+                    {"operation_name": op_name, "index": index}
+                    for _, op_name, index, _ in group
+                ],
+            }
+            for seg_name, group in groupby(rows, key=lambda r: r[3])
+        ]
+        return ORJSON(
+            status_code=200,
+            content={
+                "code": 0,
+                "message": "查询成功",
+                "data": {
+                    "total": total,
+                    "page": page,
+                    "page_size": page_size,
+                    "next_cursor": next_cursor,
+                    "data": response,
+                },
+            },
+        )
+
+
+@plant_router.get("/get_plan_segment_relationship", summary="获取计划环节执行记录")
+@cached("plant")
+async def get_plan_segment_relationship_api(
+    plan_id: Optional[int] = Query(None),
+    cursor: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    async with AsyncSessionLocal() as db:
+        stmt = select(PlanSegmentRelationship)
+        if plan_id is not None:
+            stmt = stmt.where(PlanSegmentRelationship.plan_id == plan_id)
+        if cursor is not None:
+            stmt = (
+                stmt.where(PlanSegmentRelationship.id < cursor)
+                .order_by(PlanSegmentRelationship.id.desc())
+                .limit(page_size + 1)
+            )
+            objs = (await db.execute(stmt)).scalars().all()
+            next_cursor = objs[page_size - 1].id if len(objs) > page_size else None
+            objs = objs[:page_size]
+            total = None
+        else:
+            total = (
+                await db.scalar(select(func.count()).select_from(stmt.subquery()))
+                if page == 1
+                else None
+            )
+            field = getattr(PlanSegmentRelationship, order_field)
+            stmt = stmt.order_by(field.desc() if order == "desc" else field.asc())
+            stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+            objs = (await db.execute(stmt)).scalars().all()
+            next_cursor = None
+        # 数据已出自数据库, model_construct 跳过二次校验
+        rows = [
+            PlanSegmentRelationshipSchema.model_construct(
+                **{k: getattr(obj, k) for k in _PSR_FIELDS}
+            )
+            for obj in objs
+        ]
+        data = {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "data": _PSR_ADAPTER.dump_python(rows),
+        }
+        return ORJSON(
+            status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+        )
+
+
+@plant_router.post("/add_plant_segment", summary="添加种植环节")
+async def add_plant_segment_api(req: AddPlantSegmentReq):
+    async with AsyncSessionLocal() as db:
+        # 靠 name 唯一约束去重, 省掉预查询也关掉竞态窗口
+        segment_id = await db.scalar(
+            pg_insert(Segment)
+            .values(name=req.segment_name)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Segment.id)
+        )
+        if segment_id is None:
+            await db.rollback()
+            return ORJSON(status_code=200, content={"code": 1, "message": "环节已存在"})
+        if req.operate_step:
+            await db.execute(
+                insert(PlantOperate),
+                [
+                    {
+                        "segment_id": segment_id,
+                        "name": step.operate_name,
+                        "index": step.index,
+                    }
+                    for step in req.operate_step
+                ],
+            )
+        await db.commit()
+        invalidate("plant")
+        return ORJSON(status_code=200, content={"code": 0, "message": "添加成功"})
+
+
+@plant_router.put("/update_plant_segment", summary="修改种植环节")
+async def update_plant_segment_api(req: UpdatePlantSegmentReq):
+    async with AsyncSessionLocal() as db:
+        segment = await db.get(Segment, req.segment_id)
+        if not segment:
+            return ORJSON(status_code=200, content={"code": 1, "message": "环节不存在"})
+        segment.name = req.segment_name
+        await db.commit()
+        invalidate("plant")
+        return ORJSON(status_code=200, content={"code": 0, "message": "修改成功"})
+
+
+@plant_router.delete("/delete_plant_segment", summary="删除种植环节")
+async def delete_plant_segment_api(segment_id: int = Query(...)):
+    async with AsyncSessionLocal() as db:
+        segment = await db.get(Segment, segment_id)
+        if not segment:
+            return ORJSON(status_code=200, content={"code": 1, "message": "环节不存在"})
+        # 只问"有没有引用", 不把整个 SegmentPlan 集合拉进内存
+        in_use = await db.scalar(
+            select(exists().where(SegmentPlan.segment_id == segment_id))
+        )
+        if in_use:
+            return ORJSON(
+                status_code=200,
+                content={"code": 1, "message": "环节已被种植计划引用, 不能删除"},
+            )
+        await db.delete(segment)
+        await db.commit()
+        invalidate("plant")
+        return ORJSON(status_code=200, content={"code": 0, "message": "删除成功"})
+
+
+# 环节名基本不变, 60s 的进程内缓存足以挡掉重复解析
+_SEGMENT_ID_CACHE = {}
+_SEGMENT_ID_TTL = 60
+
+
+async def _segment_id_by_name(db, name):
+    hit = _SEGMENT_ID_CACHE.get(name)
+    if hit and hit[0] > monotonic():
+        return hit[1]
+    seg_id = await db.scalar(select(Segment.id).where(Segment.name == name))
+    if seg_id is not None:
+        _SEGMENT_ID_CACHE[name] = (monotonic() + _SEGMENT_ID_TTL, seg_id)
+    return seg_id
+
+
+@plant_router.post("/add_plant_plan", summary="添加计划环节执行记录")
+async def add_plant_plan_api(req: AddPlantPlanReq):
+    if req.segment_id is None and req.segment_name is None:
+        return ORJSON(
+            status_code=200, content={"code": 1, "message": "缺少环节 id 或名称"}
+        )
+    async with AsyncSessionLocal() as db:
+        plan_exists = await db.scalar(select(exists().where(Plan.id == req.plan_id)))
+        if not plan_exists:
+            return ORJSON(status_code=200, content={"code": 1, "message": "计划不存在"})
+        # 传了 id 就不再查询, 外键约束兜底非法 id
+        segment_id = req.segment_id
+        if segment_id is None:
+            segment_id = await _segment_id_by_name(db, req.segment_name)
+        if segment_id is None:
+            return ORJSON(status_code=200, content={"code": 1, "message": "环节不存在"})
+        relationship = PlanSegmentRelationship(
+            plan_id=req.plan_id,
+            segment_id=segment_id,
+            operator=req.operator,
+            operate_date=req.operate_date,
+            remark=req.remark,
+        )
+        db.add(relationship)
+        await db.commit()
+        invalidate("plant")
+        return ORJSON(status_code=200, content={"code": 0, "message": "添加成功"})
+
+
+# 一条 UPDATE 同时换新文件名并带回旧文件名 (PostgreSQL 的 FROM 别名取更新前的行);
+# 仅 PG 方言可用, 其他方言在 _swap_uri 里退回先查旧值再 UPDATE
+_UPDATE_IMAGE_SQL = text(
+    """
+    UPDATE plan_segment_relationship AS n
+    SET image_uri = :new_uri
+    FROM plan_segment_relationship AS o
+    WHERE n.id = o.id AND n.plan_id = :plan_id AND n.segment_id = :segment_id
+    RETURNING o.image_uri
+    """
+)
+_UPDATE_VIDEO_SQL = text(
+    """
+    UPDATE plan_segment_relationship AS n
+    SET video_uri = :new_uri
+    FROM plan_segment_relationship AS o
+    WHERE n.id = o.id AND n.plan_id = :plan_id AND n.segment_id = :segment_id
+    RETURNING o.video_uri
+    """
+)
+
+
+async def _swap_uri(db, fused_sql, column, new_uri, plan_id, segment_id):
+    """换上新文件名, 返回带旧文件名的行; 记录不存在返回 None"""
+    if _IS_PG:
+        return (
+            await db.execute(
+                fused_sql,
+                {
+                    "new_uri": new_uri,
+                    "plan_id": plan_id,
+                    "segment_id": segment_id,
+                },
+            )
+        ).first()
+    # 开发库 (sqlite) 不支持 UPDATE ... FROM 自连接取旧值, 两条语句兜底
+    row = (
+        await db.execute(
+            select(column).where(
+                PlanSegmentRelationship.plan_id == plan_id,
+                PlanSegmentRelationship.segment_id == segment_id,
+            )
+        )
+    ).first()
+    if row is None:
+        return None
+    await db.execute(
+        update(PlanSegmentRelationship)
+        .where(
+            PlanSegmentRelationship.plan_id == plan_id,
+            PlanSegmentRelationship.segment_id == segment_id,
+        )
+        .values({column: new_uri})
+    )
+    return row
+
+
+# 模块级语句 + bindparam, 复用编译结果
+_REL_STMT = select(PlanSegmentRelationship).where(
+    PlanSegmentRelationship.plan_id == bindparam("plan_id"),
+    PlanSegmentRelationship.segment_id == bindparam("segment_id"),
+)
+
+
+async def _get_relationship(db, plan_id, segment_id):
+    result = await db.execute(
+        _REL_STMT, {"plan_id": plan_id, "segment_id": segment_id}
+    )
+    return result.scalar_one_or_none()
+
+
+@plant_router.delete("/delete_plant_plan", summary="删除计划环节执行记录")
+async def delete_plant_plan_api(
+    plan_id: int = Query(...),
+    segment_id: int = Query(...),
+):
+    async with AsyncSessionLocal() as db:
+        relationship = await _get_relationship(db, plan_id, segment_id)
+        if not relationship:
+            return ORJSON(status_code=200, content={"code": 1, "message": "记录不存在"})
+        purges = []
+        if relationship.image_uri:
+            purges.append(asyncio.to_thread(delete_image, relationship.image_uri))
+        if relationship.video_uri:
+            purges.append(asyncio.to_thread(delete_video, relationship.video_uri))
+        if purges:
+            # 两个 unlink 并发跑, 不再串行占用两次往返
+            await asyncio.gather(*purges)
+        await db.delete(relationship)
+        await db.commit()
+        invalidate("plant")
+        return ORJSON(status_code=200, content={"code": 0, "message": "删除成功"})
+
+
+async def _attach_image(plan_id, segment_id, image_name):
+    async with AsyncSessionLocal() as db:
+        relationship = await _get_relationship(db, plan_id, segment_id)
+        if not relationship:
+            await asyncio.to_thread(delete_image, image_name)
+            return ORJSON(status_code=200, content={"code": 1, "message": "记录不存在"})
+        relationship.image_uri = image_name
+        await db.commit()
+    invalidate("plant")
+    return ORJSON(status_code=200, content={"code": 0, "message": "添加成功"})
+
+
+@plant_router.post("/add_segment_image", summary="添加环节图片")
+async def add_segment_image_api(
+    plan_id: int = Form(...),
+    segment_id: int = Form(...),
+    image: UploadFile = File(...),
+):
+    image_name = await save_upload_image(image)
+    return await _attach_image(plan_id, segment_id, image_name)
+
+
+@plant_router.post(
+    "/add_segment_image_base64", summary="添加环节图片(base64, 已废弃)", deprecated=True
+)
+async def add_segment_image_base64_api(req: SegmentImageReq):
+    image_name = await asyncio.to_thread(save_image, req.image)
+    return await _attach_image(req.plan_id, req.segment_id, image_name)
+
+
+async def _replace_image(plan_id, segment_id, new_name):
+    async with AsyncSessionLocal() as db:
+        row = await _swap_uri(
+            db,
+            _UPDATE_IMAGE_SQL,
+            PlanSegmentRelationship.image_uri,
+            new_name,
+            plan_id,
+            segment_id,
+        )
+        if row is None:
+            await asyncio.to_thread(delete_image, new_name)
+            return ORJSON(status_code=200, content={"code": 1, "message": "记录不存在"})
+        await db.commit()
+    invalidate("plant")
+    if row[0]:
+        # 旧文件清理不阻塞响应
+        asyncio.get_running_loop().run_in_executor(None, delete_image, row[0])
+    return ORJSON(status_code=200, content={"code": 0, "message": "修改成功"})
+
+
+@plant_router.put("/update_segment_image", summary="修改环节图片")
+async def update_segment_image_api(
+    plan_id: int = Form(...),
+    segment_id: int = Form(...),
+    image: UploadFile = File(...),
+):
+    new_name = await save_upload_image(image)
+    return await _replace_image(plan_id, segment_id, new_name)
+
+
+@plant_router.put(
+    "/update_segment_image_base64", summary="修改环节图片(base64, 已废弃)", deprecated=True
+)
+async def update_segment_image_base64_api(req: SegmentImageReq):
+    new_name = await asyncio.to_thread(save_image, req.image)
+    return await _replace_image(req.plan_id, req.segment_id, new_name)
+
+
+@plant_router.post("/add_segment_video", summary="添加环节视频")
+async def add_segment_video_api(
+    plan_id: int = Form(...),
+    segment_id: int = Form(...),
+    video: UploadFile = File(...),
+):
+    async with AsyncSessionLocal() as db:
+        relationship = await _get_relationship(db, plan_id, segment_id)
+        if not relationship:
+            return ORJSON(status_code=200, content={"code": 1, "message": "记录不存在"})
+        relationship.video_uri = await save_video(video)
+        await db.commit()
+        invalidate("plant")
+        return ORJSON(status_code=200, content={"code": 0, "message": "添加成功"})
+
+
+@plant_router.put("/update_segment_video", summary="修改环节视频")
+async def update_segment_video_api(
+    plan_id: int = Form(...),
+    segment_id: int = Form(...),
+    video: UploadFile = File(...),
+):
+    new_name = await save_video(video)
+    async with AsyncSessionLocal() as db:
+        row = await _swap_uri(
+            db,
+            _UPDATE_VIDEO_SQL,
+            PlanSegmentRelationship.video_uri,
+            new_name,
+            plan_id,
+            segment_id,
+        )
+        if row is None:
+            await asyncio.to_thread(delete_video, new_name)
+            return ORJSON(status_code=200, content={"code": 1, "message": "记录不存在"})
+        await db.commit()
+    invalidate("plant")
+    if row[0]:
+        asyncio.get_running_loop().run_in_executor(None, delete_video, row[0])
+    return ORJSON(status_code=200, content={"code": 0, "message": "修改成功"})
@@ -0,0 +1,626 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Body, File, Form, Query, UploadFile
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import exists, func, insert, lambda_stmt, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+from cache import cached, invalidate
+from message import add_messages_bulk_async
+from schema.common import PlantPlanSchema, SegmentFileSchema, transform_schema
+from schema.database import AsyncSessionLocal
+from schema.tables import (
+    Client,
+    Order,
+    Plan,
+    PlantOperate,
+    PlantPlan,
+    Segment,
+    SegmentFile,
+)
+from utils import delete_segment_file, save_segment_file
+
+plant_plan_router = APIRouter(default_response_class=ORJSONResponse)
+
+# CI 里设 SQLALCHEMY_RAISELOAD=1, 漏配的预加载会直接报错而不是悄悄 N+1
+_RAISELOAD_GUARD = (
+    (raiseload("*"),) if os.environ.get("SQLALCHEMY_RAISELOAD") == "1" else ()
+)
+
+
+@plant_plan_router.get("/get_segment", summary="获取环节及操作步骤")
+@cached("plant_plan")
+async def get_segment(
+    segment_name: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    async with AsyncSessionLocal() as db:
+        # selectinload 两条查询取回整页的操作步骤, 不再靠 JOIN 撑大行数;
+        # COUNT(*) OVER() 让 total 随当前页一起返回, 省掉单独的 COUNT 查询;
+        # lambda_stmt 按构造形状缓存编译结果, 闭包里的值自动变成绑定参数
+        offset = (page - 1) * page_size
+        stmt = lambda_stmt(
+            lambda: select(Segment, func.count().over().label("total")).options(
+                selectinload(Segment.operations), *_RAISELOAD_GUARD
+            )
+        )
+        if segment_name:
+            stmt += lambda s: s.where(Segment.name == segment_name)
+        field = getattr(Segment, order_field)
+        descending = order == "desc"
+        stmt = stmt.add_criteria(
+            lambda s: s.order_by(field.desc() if descending else field.asc()),
+            track_on=(field, descending),
+        )
+        stmt += lambda s: s.offset(offset).limit(page_size)
+        rows = (await db.execute(stmt)).all()
+        total = rows[0].total if rows else 0
+        segments = [row[0] for row in rows]
+        data = [
+            {
+                "id": segment.id,
+                "name": segment.name,
+                "operations": [
+                    {"operation_name": op.name, "index": op.index}
+                    for op in segment.operations
+                ],
+            }
+            for segment in segments
+        ]
+        return ORJSONResponse(
+            status_code=200,
+            content={
+                "code": 0,
+                "message": "查询成功",
+                "data": {
+                    "total": total,
+                    "page": page,
+                    "page_size": page_size,
+                    "data": data,
+                },
+            },
+        )
+
+
+@plant_plan_router.get("/get_segment_file", summary="获取环节资料文件列表")
+@cached("plant_plan")
+async def get_segment_file(
+    segment_id: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    async with AsyncSessionLocal() as db:
+        offset = (page - 1) * page_size
+        # 只取列, 跳过 ORM 实例化直接出 dict
+        stmt = lambda_stmt(
+            lambda: select(
+                SegmentFile.id,
+                SegmentFile.segment_id,
+                SegmentFile.filename,
+                SegmentFile.file_type,
+                SegmentFile.upload_time,
+                func.count().over().label("total"),
+            )
+        )
+        if segment_id is not None:
+            stmt += lambda s: s.where(SegmentFile.segment_id == segment_id)
+        field = getattr(SegmentFile, order_field)
+        descending = order == "desc"
+        stmt = stmt.add_criteria(
+            lambda s: s.order_by(field.desc() if descending else field.asc()),
+            track_on=(field, descending),
+        )
+        stmt += lambda s: s.offset(offset).limit(page_size)
+        rows = (await db.execute(stmt)).mappings().all()
+        total = rows[0]["total"] if rows else 0
+        data = {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "data": [
+                {k: v for k, v in row.items() if k != "total"} for row in rows
+            ],
+        }
+        return ORJSONResponse(
+            status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+        )
+
+
+@plant_plan_router.get("/get_plant_plan", summary="获取计划环节执行安排")
+@cached("plant_plan")
+async def get_plant_plan(
+    plan_id: Optional[int] = Query(None),
+    year: Optional[int] = Query(None),
+    batch: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    async with AsyncSessionLocal() as db:
+        offset = (page - 1) * page_size
+        # 只取序列化需要的列, 关联名称直接 JOIN 取回, 不再实例化 ORM 对象
+        stmt = lambda_stmt(
+            lambda: select(
+                PlantPlan.id,
+                PlantPlan.plan_id,
+                Plan.year,
+                Plan.batch,
+                PlantPlan.segment_id,
+                Segment.name.label("segment_name"),
+                PlantPlan.operator_id,
+                Client.name.label("operator_name"),
+                PlantPlan.operation_date,
+                PlantPlan.remarks,
+                func.count().over().label("total"),
+            )
+            .join(Plan, Plan.id == PlantPlan.plan_id)
+            .join(Segment, Segment.id == PlantPlan.segment_id)
+            .outerjoin(Client, Client.id == PlantPlan.operator_id)
+        )
+        if plan_id is not None:
+            stmt += lambda s: s.where(PlantPlan.plan_id == plan_id)
+        if year is not None:
+            stmt += lambda s: s.where(Plan.year == year)
+        if batch is not None:
+            stmt += lambda s: s.where(Plan.batch == batch)
+        field = getattr(PlantPlan, order_field)
+        descending = order == "desc"
+        stmt = stmt.add_criteria(
+            lambda s: s.order_by(field.desc() if descending else field.asc()),
+            track_on=(field, descending),
+        )
+        stmt += lambda s: s.offset(offset).limit(page_size)
+        rows = (await db.execute(stmt)).mappings().all()
+        total = rows[0]["total"] if rows else 0
+        data = [{k: v for k, v in row.items() if k != "total"} for row in rows]
+        return ORJSONResponse(
+            status_code=200,
+            content={
+                "code": 0,
+                "message": "查询成功",
+                "data": {
+                    "total": total,
+                    "page": page,
+                    "page_size": page_size,
+                    "data": data,
+                },
+            },
+        )
+
+
+@plant_plan_router.post("/add_plant_plan", summary="添加计划环节执行安排")
+async def add_plant_plan(
+    background_tasks: BackgroundTasks,
+    plan_id: int = Body(...),
+    segment_id: int = Body(...),
+    operator_id: int = Body(...),
+    operation_date: str = Body(
+        default_factory=lambda: datetime.now().isoformat(sep=" ", timespec="seconds")
+    ),
+    remarks: Optional[str] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        # 计划/环节/操作人三项校验合并为一次往返, 顺便带回后面要用的环节名
+        plan_ok, segment_name, operator_ok = (
+            await db.execute(
+                select(
+                    exists().where(Plan.id == plan_id),
+                    select(Segment.name)
+                    .where(Segment.id == segment_id)
+                    .scalar_subquery(),
+                    exists().where(Client.id == operator_id),
+                )
+            )
+        ).one()
+        if not plan_ok:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "计划不存在"}
+            )
+        if segment_name is None:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节不存在"}
+            )
+        if not operator_ok:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "操作人不存在"}
+            )
+        plant_plan = PlantPlan(
+            plan_id=plan_id,
+            segment_id=segment_id,
+            operator_id=operator_id,
+            operation_date=datetime.fromisoformat(operation_date),
+            remarks=remarks,
+        )
+        db.add(plant_plan)
+        await db.commit()
+        invalidate("plant_plan")
+        orders = (
+            await db.execute(
+                select(Order.client_id)
+                .where(Order.plan_id == plan_id)
+                .distinct()
+            )
+        ).scalars().all()
+        # details 所有接收人相同, 只序列化一次; orjson 的 C 编码器更快
+        details = orjson.dumps(
+            transform_schema(PlantPlanSchema, plant_plan), default=str
+        ).decode()
+        # 通知扇出放到响应之后的后台任务
+        background_tasks.add_task(
+            add_messages_bulk_async,
+            orders,
+            title="种植安排新增",
+            content=f"您订购的计划新增了环节[{segment_name}]的执行安排",
+            details=details,
+            message_type="plant_plan",
+        )
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "添加成功"})
+
+
+@plant_plan_router.put("/update_plant_plan", summary="修改计划环节执行安排")
+async def update_plant_plan(
+    background_tasks: BackgroundTasks,
+    plant_plan_id: int = Body(...),
+    plan_id: Optional[int] = Body(None),
+    segment_id: Optional[int] = Body(None),
+    operator_id: Optional[int] = Body(None),
+    operation_date: Optional[str] = Body(None),
+    remarks: Optional[str] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        plant_plan = await db.get(PlantPlan, plant_plan_id)
+        if not plant_plan:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "执行安排不存在"}
+            )
+        # 与 add_plant_plan 同款: 要改的几个外键合并成一次往返校验。
+        # 开发库 sqlite 默认不开外键约束, 不能指望约束兜底
+        checks, messages = [], []
+        if plan_id is not None:
+            checks.append(exists().where(Plan.id == plan_id))
+            messages.append("计划不存在")
+        if segment_id is not None:
+            checks.append(exists().where(Segment.id == segment_id))
+            messages.append("环节不存在")
+        if operator_id is not None:
+            checks.append(exists().where(Client.id == operator_id))
+            messages.append("操作人不存在")
+        if checks:
+            row = (await db.execute(select(*checks))).one()
+            for ok, message in zip(row, messages):
+                if not ok:
+                    return ORJSONResponse(
+                        status_code=200, content={"code": 1, "message": message}
+                    )
+        if plan_id is not None:
+            plant_plan.plan_id = plan_id
+        if segment_id is not None:
+            plant_plan.segment_id = segment_id
+        if operator_id is not None:
+            plant_plan.operator_id = operator_id
+        if operation_date is not None:
+            plant_plan.operation_date = datetime.fromisoformat(operation_date)
+        if remarks is not None:
+            plant_plan.remarks = remarks
+        try:
+            await db.commit()
+            invalidate("plant_plan")
+        except IntegrityError:
+            await db.rollback()
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "关联数据不存在"}
+            )
+        orders = (
+            await db.execute(
+                select(Order.client_id)
+                .where(Order.plan_id == plant_plan.plan_id)
+                .distinct()
+            )
+        ).scalars().all()
+        # details 所有接收人相同, 只序列化一次; orjson 的 C 编码器更快
+        details = orjson.dumps(
+            transform_schema(PlantPlanSchema, plant_plan), default=str
+        ).decode()
+        # 通知扇出放到响应之后的后台任务
+        background_tasks.add_task(
+            add_messages_bulk_async,
+            orders,
+            title="种植安排变更",
+            content="您订购的计划的环节执行安排有更新",
+            details=details,
+            message_type="plant_plan",
+        )
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "修改成功"})
+
+
+@plant_plan_router.delete("/delete_plant_plan", summary="删除计划环节执行安排")
+async def delete_plant_plan(
+    background_tasks: BackgroundTasks, plant_plan_id: int = Query(...)
+):
+    async with AsyncSessionLocal() as db:
+        plant_plan = await db.get(PlantPlan, plant_plan_id)
+        if not plant_plan:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "执行安排不存在"}
+            )
+        plan_id = plant_plan.plan_id
+        await db.delete(plant_plan)
+        await db.commit()
+        invalidate("plant_plan")
+        orders = (
+            await db.execute(
+                select(Order.client_id)
+                .where(Order.plan_id == plan_id)
+                .distinct()
+            )
+        ).scalars().all()
+        # details 所有接收人相同, 只序列化一次; orjson 的 C 编码器更快
+        details = orjson.dumps(
+            transform_schema(PlantPlanSchema, plant_plan), default=str
+        ).decode()
+        # 通知扇出放到响应之后的后台任务
+        background_tasks.add_task(
+            add_messages_bulk_async,
+            orders,
+            title="种植安排取消",
+            content="您订购的计划有环节执行安排被取消",
+            details=details,
+            message_type="plant_plan",
+        )
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "删除成功"})
+
+
+@plant_plan_router.post("/add_segment", summary="添加环节")
+async def add_segment(
+    segment_name: str = Body(...),
+    operate_steps: list = Body([]),
+):
+    async with AsyncSessionLocal() as db:
+        # 靠 name 唯一约束去重, 一条原子语句代替先查后插
+        new_segment_id = await db.scalar(
+            pg_insert(Segment)
+            .values(name=segment_name)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Segment.id)
+        )
+        if new_segment_id is None:
+            await db.rollback()
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节已存在"}
+            )
+        if operate_steps:
+            # 一条多行 INSERT 代替向集合逐个 append
+            await db.execute(
+                insert(PlantOperate),
+                [
+                    {
+                        "segment_id": new_segment_id,
+                        "name": step["operate_name"],
+                        "index": step["index"],
+                    }
+                    for step in operate_steps
+                ],
+            )
+        await db.commit()
+        invalidate("plant_plan")
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "添加成功"})
+
+
+@plant_plan_router.put("/update_segment", summary="修改环节")
+async def update_segment(
+    background_tasks: BackgroundTasks,
+    segment_id: int = Body(...),
+    segment_name: Optional[str] = Body(None),
+    operate_steps: Optional[list] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        segment = await db.get(Segment, segment_id)
+        if not segment:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节不存在"}
+            )
+        if segment_name is not None:
+            segment.name = segment_name
+        if operate_steps is not None:
+            # 一条批量 DELETE + 一条多行 INSERT 整体替换操作步骤
+            await db.execute(
+                PlantOperate.__table__.delete().where(
+                    PlantOperate.segment_id == segment_id
+                )
+            )
+            if operate_steps:
+                await db.execute(
+                    insert(PlantOperate),
+                    [
+                        {
+                            "segment_id": segment_id,
+                            "name": step["operate_name"],
+                            "index": step["index"],
+                        }
+                        for step in operate_steps
+                    ],
+                )
+        await db.commit()
+        invalidate("plant_plan")
+        orders = (
+            await db.execute(
+                select(Order.client_id)
+                .where(
+                    Order.plan_id.in_(
+                        select(PlantPlan.plan_id).where(
+                            PlantPlan.segment_id == segment_id
+                        )
+                    )
+                )
+                .distinct()
+            )
+        ).scalars().all()
+        # details 所有接收人相同, 只序列化一次; orjson 的 C 编码器更快
+        details = orjson.dumps(
+            {"segment_id": segment_id, "segment_name": segment.name}, default=str
+        ).decode()
+        # 通知扇出放到响应之后的后台任务
+        background_tasks.add_task(
+            add_messages_bulk_async,
+            orders,
+            title="环节调整",
+            content=f"环节[{segment.name}]的操作步骤有调整",
+            details=details,
+            message_type="segment",
+        )
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "修改成功"})
+
+
+@plant_plan_router.delete("/delete_segment", summary="删除环节")
+async def delete_segment(
+    background_tasks: BackgroundTasks, segment_id: int = Query(...)
+):
+    async with AsyncSessionLocal() as db:
+        segment = await db.get(Segment, segment_id)
+        if not segment:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节不存在"}
+            )
+        segment_name = segment.name
+        orders = (
+            await db.execute(
+                select(Order.client_id)
+                .where(
+                    Order.plan_id.in_(
+                        select(PlantPlan.plan_id).where(
+                            PlantPlan.segment_id == segment_id
+                        )
+                    )
+                )
+                .distinct()
+            )
+        ).scalars().all()
+        await db.delete(segment)
+        await db.commit()
+        invalidate("plant_plan")
+        # details 所有接收人相同, 只序列化一次; orjson 的 C 编码器更快
+        details = orjson.dumps(
+            {"segment_id": segment_id, "segment_name": segment_name}, default=str
+        ).decode()
+        # 通知扇出放到响应之后的后台任务
+        background_tasks.add_task(
+            add_messages_bulk_async,
+            orders,
+            title="环节删除",
+            content=f"环节[{segment_name}]已删除",
+            details=details,
+            message_type="segment",
+        )
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "删除成功"})
+
+
+@plant_plan_router.post("/upload_file", summary="上传环节资料文件")
+async def upload_file(
+    background_tasks: BackgroundTasks,
+    segment_id: int = Form(...),
+    file: UploadFile = File(...),
+):
+    async with AsyncSessionLocal() as db:
+        segment = await db.get(Segment, segment_id)
+        if not segment:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节不存在"}
+            )
+        filename = await save_segment_file(file)
+        segment_file = SegmentFile(
+            segment_id=segment_id,
+            filename=filename,
+            file_type=(file.filename or "").rsplit(".", 1)[-1] if file.filename else None,
+        )
+        db.add(segment_file)
+        await db.commit()
+        invalidate("plant_plan")
+        orders = (
+            await db.execute(
+                select(Order.client_id)
+                .where(
+                    Order.plan_id.in_(
+                        select(PlantPlan.plan_id).where(
+                            PlantPlan.segment_id == segment_id
+                        )
+                    )
+                )
+                .distinct()
+            )
+        ).scalars().all()
+        # details 所有接收人相同, 只序列化一次; orjson 的 C 编码器更快
+        details = orjson.dumps(
+            transform_schema(SegmentFileSchema, segment_file), default=str
+        ).decode()
+        # 通知扇出放到响应之后的后台任务
+        background_tasks.add_task(
+            add_messages_bulk_async,
+            orders,
+            title="环节资料上传",
+            content=f"环节[{segment.name}]有新的资料文件",
+            details=details,
+            message_type="segment_file",
+        )
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "上传成功"})
+
+
+@plant_plan_router.delete("/delete_file", summary="删除环节资料文件")
+async def delete_file(
+    background_tasks: BackgroundTasks, file_id: int = Query(...)
+):
+    async with AsyncSessionLocal() as db:
+        segment_file = (
+            await db.execute(
+                select(SegmentFile)
+                .options(joinedload(SegmentFile.segment), *_RAISELOAD_GUARD)
+                .where(SegmentFile.id == file_id)
+            )
+        ).scalar_one_or_none()
+        if not segment_file:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "文件不存在"}
+            )
+        segment_name = segment_file.segment.name
+        segment_id = segment_file.segment_id
+        # 磁盘删除是阻塞调用, 丢进线程池, 事件循环继续跑别的请求
+        await asyncio.to_thread(delete_segment_file, segment_file.filename)
+        details = orjson.dumps(
+            transform_schema(SegmentFileSchema, segment_file)
+        ).decode()
+        await db.delete(segment_file)
+        await db.commit()
+        invalidate("plant_plan")
+        orders = (
+            await db.execute(
+                select(Order.client_id)
+                .where(
+                    Order.plan_id.in_(
+                        select(PlantPlan.plan_id).where(
+                            PlantPlan.segment_id == segment_id
+                        )
+                    )
+                )
+                .distinct()
+            )
+        ).scalars().all()
+        background_tasks.add_task(
+            add_messages_bulk_async,
+            orders,
+            title="环节资料删除",
+            content=f"环节[{segment_name}]的资料文件已删除",
+            details=details,
+            message_type="segment_file",
+        )
+        return ORJSONResponse(status_code=200, content={"code": 0, "message": "删除成功"})
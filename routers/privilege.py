@@ -0,0 +1,742 @@
+import os
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Body, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, case, func, insert, select, update
+from sqlalchemy.orm import contains_eager, joinedload, raiseload, selectinload
+
+from cache import cached, invalidate
+from schema.database import AsyncSessionLocal
+from schema.common import (
+    ClientPrivilegeRelationSchema,
+    PrivilegeSchema,
+    page_with_cursor_async,
+    page_with_order_async,
+    transform_schema,
+)
+from schema.tables import (
+    _IS_PG,
+    Client,
+    ClientPrivilege,
+    Privilege,
+    PrivilegeUsage,
+)
+from schema.views import mv_client_privilege, refresh_client_privilege_mv
+
+# 列表响应体大, orjson 的 C 编码器比纯 Python 的 json 快数倍
+privilege_router = APIRouter(default_response_class=ORJSONResponse)
+
+# 开发/压测环境设 SQLALCHEMY_RAISELOAD=1, 漏配预加载的关系一访问就报错
+_RAISELOAD_GUARD = (
+    (raiseload("*"),) if os.environ.get("SQLALCHEMY_RAISELOAD") == "1" else ()
+)
+
+
+# 固定内容的响应只构造/编码一次, 热路径直接复用同一个响应对象
+_PRIV_NOT_FOUND = ORJSONResponse({"code": 1, "message": "权益不存在"})
+_CLIENT_PRIV_NOT_FOUND = ORJSONResponse({"code": 1, "message": "客户权益不存在"})
+_ADD_OK = ORJSONResponse({"code": 0, "message": "添加成功"})
+_UPDATE_OK = ORJSONResponse({"code": 0, "message": "更新成功"})
+_DELETE_OK = ORJSONResponse({"code": 0, "message": "删除成功"})
+_USE_OK = ORJSONResponse({"code": 0, "message": "核销成功"})
+_MODIFY_OK = ORJSONResponse({"code": 0, "message": "调整成功"})
+
+# 发放/创建走的热语句提升到模块级, 每次请求直接命中编译缓存
+# (引擎侧 query_cache_size 已调大, 见 schema/database.py)
+_PRIV_BY_ID = select(Privilege).where(Privilege.id == bindparam("privilege_id"))
+_ACTIVE_PRIV_BY_NAME = select(Privilege).where(
+    Privilege.name == bindparam("name"), Privilege.deleted == False
+)
+
+
+def generate_privilege_number():
+    """生成权益编号
+
+    与 uuid4().hex 同为 32 位十六进制, 但省掉 UUID 对象的构造校验。
+    """
+    return secrets.token_hex(16)
+
+
+@privilege_router.get("/generate_privilege_number", summary="生成权益编号")
+async def generate_privilege_number_api():
+    return ORJSONResponse(
+        status_code=200,
+        content={"code": 0, "message": "生成成功", "data": generate_privilege_number()},
+    )
+
+
+@privilege_router.get("/get_privileges", summary="获取权益列表")
+@cached("privilege", ttl=300)
+async def get_privileges(
+    privilege_type: Optional[str] = Query(None),
+    expired: Optional[bool] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+    cursor: Optional[str] = Query(None, description="游标分页, 首页传空串"),
+):
+    stmt = select(Privilege).where(Privilege.deleted == False)
+    if privilege_type:
+        stmt = stmt.where(Privilege.privilege_type == privilege_type)
+    if expired is True:
+        # func.now() 让谓词完全在库端求值, 直接探 (deleted, expired_time)
+        # 索引, 也避开应用机与库的时区/时钟偏差
+        stmt = stmt.where(Privilege.expired_time <= func.now())
+    elif expired is False:
+        stmt = stmt.where(Privilege.expired_time > func.now())
+    async with AsyncSessionLocal() as db:
+        if cursor is not None:
+            # 游标分页: keyset 查找 + 免 COUNT, 深页不退化
+            data = await page_with_cursor_async(
+                PrivilegeSchema,
+                db,
+                stmt,
+                cursor=cursor or None,
+                page_size=page_size,
+                order_field=order_field,
+            )
+        else:
+            data = await page_with_order_async(
+                PrivilegeSchema,
+                db,
+                stmt,
+                page=page,
+                page_size=page_size,
+                order_field=order_field,
+                order=order,
+                count=False,
+            )
+    return ORJSONResponse(
+        status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+    )
+
+
+@privilege_router.get(
+    "/get_privilege_client_relationship", summary="获取客户权益列表", deprecated=True
+)
+async def get_privilege_client_relationship(
+    client_name: Optional[str] = Query(None),
+    privilege_number: Optional[str] = Query(None),
+    effective_time: Optional[datetime] = Query(None),
+    expired_date: Optional[datetime] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    stmt = select(ClientPrivilege)
+    if client_name:
+        # 直接 JOIN 过滤, 省掉取 client.id 的预查询, 同名客户也能全部命中
+        stmt = stmt.join(Client).where(Client.name == client_name)
+    if privilege_number:
+        stmt = stmt.where(
+            ClientPrivilege.privilege_number == privilege_number
+        )
+    if effective_time:
+        stmt = stmt.where(ClientPrivilege.effective_time >= effective_time)
+    if expired_date:
+        stmt = stmt.where(ClientPrivilege.expired_date <= expired_date)
+    # 序列化嵌套的 privilege/client 时不再逐行懒加载,
+    # selectinload 按页各补一条 IN() 查询即可
+    stmt = stmt.options(
+        selectinload(ClientPrivilege.privilege),
+        selectinload(ClientPrivilege.client),
+        *_RAISELOAD_GUARD,
+    )
+    async with AsyncSessionLocal() as db:
+        data = await page_with_order_async(
+            ClientPrivilegeRelationSchema,
+            db,
+            stmt,
+            page=page,
+            page_size=page_size,
+            order_field=order_field,
+            order=order,
+            count=False,
+        )
+    return ORJSONResponse(
+        status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+    )
+
+
+@privilege_router.get(
+    "/v2/get_privilege_client_relationship", summary="获取客户权益列表"
+)
+async def get_privilege_client_relationship_v2(
+    client_id: Optional[int] = Query(None),
+    privilege_id: Optional[int] = Query(None),
+    privilege_number: Optional[str] = Query(None),
+    use_status: Optional[str] = Query(None, description="unused/using/used_up"),
+    expired: Optional[bool] = Query(None),
+    effective_time: Optional[datetime] = Query(None),
+    expired_date: Optional[datetime] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+    cursor: Optional[str] = Query(None, description="游标分页, 首页传空串"),
+):
+    stmt = select(ClientPrivilege)
+    joined_client = joined_privilege = False
+    if client_id is not None:
+        stmt = stmt.join(Client).where(Client.id == client_id)
+        joined_client = True
+    if privilege_id is not None:
+        stmt = stmt.join(Privilege).where(Privilege.id == privilege_id)
+        joined_privilege = True
+    if privilege_number:
+        stmt = stmt.where(
+            ClientPrivilege.privilege_number == privilege_number
+        )
+    if use_status in ("unused", "using", "used_up") and _IS_PG:
+        # PG 上计算型状态谓词改走物化视图的 status 索引半连接,
+        # 响应结构不变 (视图由写接口后台 CONCURRENTLY 刷新)
+        stmt = stmt.where(
+            ClientPrivilege.id.in_(
+                select(mv_client_privilege.c.id).where(
+                    mv_client_privilege.c.status == use_status
+                )
+            )
+        )
+    elif use_status == "unused":
+        # amount = used + unused 恒成立, 各状态留一个谓词即可,
+        # 冗余子句只会妨碍优化器走索引
+        stmt = stmt.where(ClientPrivilege.used_amount == 0)
+    elif use_status == "using":
+        stmt = stmt.where(
+            ClientPrivilege.used_amount > 0,
+            ClientPrivilege.unused_amount > 0,
+        )
+    elif use_status == "used_up":
+        stmt = stmt.where(ClientPrivilege.unused_amount == 0)
+    if expired is True:
+        stmt = stmt.where(ClientPrivilege.expired_date <= func.now())
+    elif expired is False:
+        stmt = stmt.where(ClientPrivilege.expired_date > func.now())
+    if effective_time:
+        stmt = stmt.where(ClientPrivilege.effective_time >= effective_time)
+    if expired_date:
+        stmt = stmt.where(ClientPrivilege.expired_date <= expired_date)
+    # 一次 JOIN 带出 privilege/client, 逐行序列化不再各打一条 SELECT;
+    # 过滤时已 JOIN 的表用 contains_eager 复用, 避免重复 JOIN
+    stmt = stmt.options(
+        contains_eager(ClientPrivilege.client)
+        if joined_client
+        else joinedload(ClientPrivilege.client),
+        contains_eager(ClientPrivilege.privilege)
+        if joined_privilege
+        else joinedload(ClientPrivilege.privilege),
+        *_RAISELOAD_GUARD,
+    )
+    async with AsyncSessionLocal() as db:
+        if cursor is not None:
+            # 游标分页: ClientPrivilege 行数最大, 深页 OFFSET 扫描最先拖垮它
+            data = await page_with_cursor_async(
+                ClientPrivilegeRelationSchema,
+                db,
+                stmt,
+                cursor=cursor or None,
+                page_size=page_size,
+                order_field=order_field,
+            )
+        else:
+            data = await page_with_order_async(
+                ClientPrivilegeRelationSchema,
+                db,
+                stmt,
+                page=page,
+                page_size=page_size,
+                order_field=order_field,
+                order=order,
+                count=False,
+            )
+    return ORJSONResponse(
+        status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+    )
+
+
+@privilege_router.post("/create_privilege", summary="创建权益")
+async def create_privilege(
+    name: str = Body(...),
+    privilege_type: Optional[str] = Body(None),
+    description: Optional[str] = Body(None),
+    effective_time: Optional[datetime] = Body(None),
+    expired_time: Optional[datetime] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        exist = await db.scalar(_ACTIVE_PRIV_BY_NAME, {"name": name})
+        if exist:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "权益已存在"}
+            )
+        privilege = Privilege(
+            name=name,
+            privilege_type=privilege_type,
+            description=description,
+            effective_time=effective_time,
+            expired_time=expired_time,
+        )
+        db.add(privilege)
+        await db.commit()
+    invalidate("privilege")
+    return ORJSONResponse(
+        status_code=200,
+        content={
+            "code": 0,
+            "message": "创建成功",
+            "data": transform_schema(PrivilegeSchema, privilege),
+        },
+    )
+
+
+@privilege_router.put("/update_privilege", summary="更新权益")
+async def update_privilege(
+    privilege_id: int = Body(...),
+    name: Optional[str] = Body(None),
+    privilege_type: Optional[str] = Body(None),
+    description: Optional[str] = Body(None),
+):
+    values = {
+        key: value
+        for key, value in (
+            ("name", name),
+            ("privilege_type", privilege_type),
+            ("description", description),
+        )
+        if value is not None
+    }
+    if not values:
+        return _UPDATE_OK
+    async with AsyncSessionLocal() as db:
+        # 单条 UPDATE 代替先查后改, rowcount 顺带判断是否存在
+        result = await db.execute(
+            update(Privilege).where(Privilege.id == privilege_id).values(**values)
+        )
+        if result.rowcount == 0:
+            return _PRIV_NOT_FOUND
+        await db.commit()
+    invalidate("privilege")
+    return _UPDATE_OK
+
+
+@privilege_router.delete("/delete_privilege", summary="删除权益")
+async def delete_privilege(
+    privilege_id: int = Query(...),
+):
+    async with AsyncSessionLocal() as db:
+        # 软删除 + 改名腾出权益名, 一条 UPDATE 在库内完成
+        result = await db.execute(
+            update(Privilege)
+            .where(Privilege.id == privilege_id, Privilege.deleted == False)
+            .values(deleted=True, name=Privilege.name + "_deleted")
+        )
+        if result.rowcount == 0:
+            return _PRIV_NOT_FOUND
+        await db.commit()
+    invalidate("privilege")
+    return _DELETE_OK
+
+
+@privilege_router.post(
+    "/add_privilege_client_relationship", summary="给客户添加权益", deprecated=True
+)
+async def add_privilege_client_relationship(
+    privilege_id: int = Body(...),
+    clients: str = Body(..., description="客户名, 逗号分隔"),
+    amount: int = Body(1),
+    effective_time: Optional[datetime] = Body(None),
+    expired_date: Optional[datetime] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        privilege = await db.scalar(
+            _PRIV_BY_ID, {"privilege_id": privilege_id}
+        )
+        if not privilege:
+            return _PRIV_NOT_FOUND
+        names = clients.split(",")
+        # 两条 IN() 查询代替逐客户查找, N 个客户 2N 次往返降为 2 次
+        client_rows = (
+            await db.scalars(select(Client).where(Client.name.in_(names)))
+        ).all()
+        by_name = {c.name: c for c in client_rows}
+        for name in names:
+            if name not in by_name:
+                return ORJSONResponse(
+                    status_code=200,
+                    content={"code": 1, "message": f"客户{name}不存在"},
+                )
+        client_ids = [c.id for c in client_rows]
+        existing_ids = set(
+            (
+                await db.scalars(
+                    select(ClientPrivilege.client_id).where(
+                        ClientPrivilege.privilege_id == privilege.id,
+                        ClientPrivilege.client_id.in_(client_ids),
+                    )
+                )
+            ).all()
+        )
+        # 已有的行一条批量 UPDATE 加量, 新行一次 executemany 插入,
+        # 2N 条语句收敛成固定 2 条
+        if existing_ids:
+            await db.execute(
+                update(ClientPrivilege)
+                .where(
+                    ClientPrivilege.privilege_id == privilege.id,
+                    ClientPrivilege.client_id.in_(existing_ids),
+                )
+                .values(
+                    amount=ClientPrivilege.amount + amount,
+                    unused_amount=ClientPrivilege.unused_amount + amount,
+                )
+            )
+        new_ids = [cid for cid in client_ids if cid not in existing_ids]
+        if new_ids:
+            await db.execute(
+                insert(ClientPrivilege),
+                [
+                    {
+                        "client_id": cid,
+                        "privilege_id": privilege.id,
+                        "effective_time": effective_time,
+                        "expired_date": expired_date,
+                        "amount": amount,
+                        "used_amount": 0,
+                        "unused_amount": amount,
+                    }
+                    for cid in new_ids
+                ],
+            )
+        await db.commit()
+    return _ADD_OK
+
+
+@privilege_router.post("/add_privilege_to_client_by_id", summary="按客户ID添加权益")
+async def add_privilege_to_client_by_id(
+    privilege_id: int = Body(...),
+    clients: str = Body(..., description="客户ID, 逗号分隔"),
+    amount: int = Body(1),
+    effective_time: Optional[datetime] = Body(None),
+    expired_date: Optional[datetime] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        privilege = await db.scalar(
+            _PRIV_BY_ID, {"privilege_id": privilege_id}
+        )
+        if not privilege:
+            return _PRIV_NOT_FOUND
+        client_ids = [int(client) for client in clients.split(",")]
+        # 同样改成两条 IN() 查询, 循环内不再打库
+        client_rows = (
+            await db.scalars(select(Client).where(Client.id.in_(client_ids)))
+        ).all()
+        by_id = {c.id: c for c in client_rows}
+        for client_id in client_ids:
+            if client_id not in by_id:
+                return ORJSONResponse(
+                    status_code=200,
+                    content={"code": 1, "message": f"客户{client_id}不存在"},
+                )
+        existing_ids = set(
+            (
+                await db.scalars(
+                    select(ClientPrivilege.client_id).where(
+                        ClientPrivilege.privilege_id == privilege.id,
+                        ClientPrivilege.client_id.in_(client_ids),
+                    )
+                )
+            ).all()
+        )
+        # 同上: 一条批量 UPDATE + 一次 executemany INSERT
+        if existing_ids:
+            await db.execute(
+                update(ClientPrivilege)
+                .where(
+                    ClientPrivilege.privilege_id == privilege.id,
+                    ClientPrivilege.client_id.in_(existing_ids),
+                )
+                .values(
+                    amount=ClientPrivilege.amount + amount,
+                    unused_amount=ClientPrivilege.unused_amount + amount,
+                )
+            )
+        new_ids = [cid for cid in client_ids if cid not in existing_ids]
+        if new_ids:
+            await db.execute(
+                insert(ClientPrivilege),
+                [
+                    {
+                        "client_id": cid,
+                        "privilege_id": privilege.id,
+                        "effective_time": effective_time,
+                        "expired_date": expired_date,
+                        "amount": amount,
+                        "used_amount": 0,
+                        "unused_amount": amount,
+                    }
+                    for cid in new_ids
+                ],
+            )
+        await db.commit()
+    return _ADD_OK
+
+
+@privilege_router.post(
+    "/v2/add_privilege_client_relationship", summary="给客户添加权益"
+)
+async def add_privilege_to_clients(
+    background_tasks: BackgroundTasks,
+    privilege_name: str = Body(...),
+    clients: str = Body(..., description="客户名或ID, 逗号分隔"),
+    field_type: str = Body("name", description="name/id"),
+    amount: int = Body(1),
+    effective_time: Optional[datetime] = Body(None),
+    expired_date: Optional[datetime] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        privilege = await db.scalar(
+            _ACTIVE_PRIV_BY_NAME, {"name": privilege_name}
+        )
+        if not privilege:
+            return _PRIV_NOT_FOUND
+        # 一条 IN 查询代替逐客户 SELECT, M 个客户只走一次数据库
+        names = clients.split(",")
+        if field_type == "id":
+            rows = await db.scalars(
+                select(Client).where(Client.id.in_([int(x) for x in names]))
+            )
+            by_key = {str(client.id): client for client in rows}
+        else:
+            rows = await db.scalars(select(Client).where(Client.name.in_(names)))
+            by_key = {client.name: client for client in rows}
+        missing = [x for x in names if x not in by_key]
+        if missing:
+            return ORJSONResponse(
+                status_code=200,
+                content={"code": 1, "message": f"客户{missing[0]}不存在"},
+            )
+        # executemany 批量插入, 绕过逐对象的 unit-of-work
+        await db.execute(
+            insert(ClientPrivilege),
+            [
+                {
+                    "client_id": by_key[client].id,
+                    "privilege_id": privilege.id,
+                    "effective_time": effective_time,
+                    "expired_date": expired_date,
+                    "amount": amount,
+                    "used_amount": 0,
+                    "unused_amount": amount,
+                }
+                for client in names
+            ],
+        )
+        await db.commit()
+    background_tasks.add_task(refresh_client_privilege_mv)
+    return _ADD_OK
+
+
+@privilege_router.post("/use_privilege", summary="按权益编号核销权益")
+async def use_privilege(
+    background_tasks: BackgroundTasks,
+    privilege_number: str = Body(...),
+    amount: int = Body(1),
+    remarks: Optional[str] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        # 条件 UPDATE 一步完成"够不够扣"判断和扣减, 行锁兜底并发,
+        # 不会出现两个请求都通过 Python 侧检查后超扣
+        row = (
+            await db.execute(
+                update(ClientPrivilege)
+                .where(
+                    ClientPrivilege.privilege_number == privilege_number,
+                    ClientPrivilege.unused_amount >= amount,
+                )
+                .values(
+                    unused_amount=ClientPrivilege.unused_amount - amount,
+                    used_amount=ClientPrivilege.used_amount + amount,
+                )
+                .returning(
+                    ClientPrivilege.id,
+                    ClientPrivilege.privilege_id,
+                    ClientPrivilege.client_id,
+                )
+            )
+        ).first()
+        if row is None:
+            # 冷路径补查一次, 区分"不存在"和"数量不足"
+            exists = await db.scalar(
+                select(ClientPrivilege.id).where(
+                    ClientPrivilege.privilege_number == privilege_number
+                )
+            )
+            return ORJSONResponse(
+                status_code=200,
+                content={
+                    "code": 1,
+                    "message": "权益数量不足" if exists else "客户权益不存在",
+                },
+            )
+        db.add(
+            PrivilegeUsage(
+                client_privilege_id=row.id,
+                privilege_id=row.privilege_id,
+                client_id=row.client_id,
+                used_amount=amount,
+                remarks=remarks,
+            )
+        )
+        await db.commit()
+    background_tasks.add_task(refresh_client_privilege_mv)
+    return _USE_OK
+
+
+@privilege_router.post("/use_privilege_by_id", summary="按ID核销权益")
+async def use_privilege_by_id(
+    background_tasks: BackgroundTasks,
+    client_privilege_id: int = Body(...),
+    amount: int = Body(1),
+    remarks: Optional[str] = Body(None),
+):
+    async with AsyncSessionLocal() as db:
+        # 与按编号核销同款条件 UPDATE: 校验 + 扣减一步原子完成,
+        # 并发下不会两边都过 Python 检查后超扣
+        row = (
+            await db.execute(
+                update(ClientPrivilege)
+                .where(
+                    ClientPrivilege.id == client_privilege_id,
+                    ClientPrivilege.unused_amount >= amount,
+                )
+                .values(
+                    unused_amount=ClientPrivilege.unused_amount - amount,
+                    used_amount=ClientPrivilege.used_amount + amount,
+                )
+                .returning(
+                    ClientPrivilege.privilege_id, ClientPrivilege.client_id
+                )
+            )
+        ).first()
+        if row is None:
+            # 冷路径补查一次, 区分"不存在"和"数量不足"
+            exists = await db.get(ClientPrivilege, client_privilege_id)
+            return ORJSONResponse(
+                status_code=200,
+                content={
+                    "code": 1,
+                    "message": "权益数量不足" if exists else "客户权益不存在",
+                },
+            )
+        db.add(
+            PrivilegeUsage(
+                client_privilege_id=client_privilege_id,
+                privilege_id=row.privilege_id,
+                client_id=row.client_id,
+                used_amount=amount,
+                remarks=remarks,
+            )
+        )
+        await db.commit()
+    background_tasks.add_task(refresh_client_privilege_mv)
+    return _USE_OK
+
+
+@privilege_router.put("/modify_privilege_amount", summary="调整客户权益数量")
+async def modify_privilege_amount(
+    background_tasks: BackgroundTasks,
+    client_privilege_id: int = Body(...),
+    amount: int = Body(..., gt=0),
+    operation_type: str = Body(..., description="add/sub"),
+):
+    async with AsyncSessionLocal() as db:
+        # 算术下推到 SQL: 条件 UPDATE 原子完成校验 + 扣减,
+        # 并发发放/核销下不会基于过期读数覆盖写
+        if operation_type == "sub":
+            result = await db.execute(
+                update(ClientPrivilege)
+                .where(
+                    ClientPrivilege.id == client_privilege_id,
+                    ClientPrivilege.amount >= amount,
+                )
+                .values(
+                    amount=ClientPrivilege.amount - amount,
+                    unused_amount=case(
+                        (
+                            ClientPrivilege.unused_amount >= amount,
+                            ClientPrivilege.unused_amount - amount,
+                        ),
+                        else_=0,
+                    ),
+                )
+            )
+            if result.rowcount == 0:
+                # 冷路径补查一次, 区分"不存在"和"数量不足"
+                exists = await db.get(ClientPrivilege, client_privilege_id)
+                return ORJSONResponse(
+                    status_code=200,
+                    content={
+                        "code": 1,
+                        "message": "权益数量不足" if exists else "客户权益不存在",
+                    },
+                )
+        else:
+            result = await db.execute(
+                update(ClientPrivilege)
+                .where(ClientPrivilege.id == client_privilege_id)
+                .values(
+                    amount=ClientPrivilege.amount + amount,
+                    unused_amount=ClientPrivilege.unused_amount + amount,
+                )
+            )
+            if result.rowcount == 0:
+                return ORJSONResponse(
+                    status_code=200,
+                    content={"code": 1, "message": "客户权益不存在"},
+                )
+        await db.commit()
+    background_tasks.add_task(refresh_client_privilege_mv)
+    return _MODIFY_OK
+
+
+@privilege_router.put("/update_privilege_from_client", summary="更新客户权益")
+async def update_privilege_from_client(
+    client_privilege_id: int = Body(...),
+    effective_time: Optional[datetime] = Body(None),
+    expired_date: Optional[datetime] = Body(None),
+):
+    values = {}
+    if effective_time is not None:
+        values["effective_time"] = effective_time
+    if expired_date is not None:
+        values["expired_date"] = expired_date
+    if not values:
+        return _UPDATE_OK
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ClientPrivilege)
+            .where(ClientPrivilege.id == client_privilege_id)
+            .values(**values)
+        )
+        if result.rowcount == 0:
+            return _CLIENT_PRIV_NOT_FOUND
+        await db.commit()
+    return _UPDATE_OK
+
+
+@privilege_router.delete("/delete_privilege_from_client", summary="删除客户权益")
+async def delete_privilege_from_client(
+    client_privilege_id: int = Query(...),
+):
+    async with AsyncSessionLocal() as db:
+        # PK 查找走 db.get: 先查身份映射, 语句也是预编译好的
+        client_privilege = await db.get(ClientPrivilege, client_privilege_id)
+        if not client_privilege:
+            return _CLIENT_PRIV_NOT_FOUND
+        await db.delete(client_privilege)
+        await db.commit()
+    return _DELETE_OK
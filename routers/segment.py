@@ -0,0 +1,504 @@
+import os
+from datetime import datetime
+from time import monotonic
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Body, File, Form, Query, UploadFile
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+from message import add_messages_bulk
+from schema.database import AsyncSessionLocal, SessionLocal
+from schema.tables import (
+    Client,
+    OperationImplementationInformation,
+    Order,
+    Plan,
+    PlantOperate,
+    Segment,
+    SegmentPlan,
+)
+from utils import delete_image, delete_video, save_upload_image, save_video
+
+segment_router = APIRouter(default_response_class=ORJSONResponse)
+
+# 计划的订购客户变化低频, 60s 进程内缓存挡掉通知路径上的重复去重扫描
+_PLAN_CLIENTS_CACHE = {}
+_PLAN_CLIENTS_TTL = 60
+
+
+def _client_ids_for_plan(db, plan_id):
+    hit = _PLAN_CLIENTS_CACHE.get(plan_id)
+    if hit and hit[0] > monotonic():
+        return hit[1]
+    ids = [
+        row[0]
+        for row in db.query(Order.client_id)
+        .filter(Order.plan_id == plan_id)
+        .distinct()
+        .all()
+    ]
+    _PLAN_CLIENTS_CACHE[plan_id] = (monotonic() + _PLAN_CLIENTS_TTL, ids)
+    return ids
+
+
+def _purge_media(filenames):
+    """后台清理实施信息关联的图片/视频文件"""
+    for image_filename, video_filename in filenames:
+        if image_filename:
+            delete_image(image_filename)
+        if video_filename:
+            delete_video(video_filename)
+
+
+def _parse_ts(value):
+    """解析 "YYYY-MM-DD HH:MM:SS" 时间串
+
+    fromisoformat 是 C 实现, 比每次重新编译格式串的 strptime 快一个量级。
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+# CI 里设 SQLALCHEMY_RAISELOAD=1, 漏配的预加载会直接报错而不是悄悄 N+1
+_RAISELOAD_GUARD = (
+    (raiseload("*"),) if os.environ.get("SQLALCHEMY_RAISELOAD") == "1" else ()
+)
+
+# 列表端点只取列, 跳过 ORM 实例化直接出 dict
+def _segment_plan_brief(segment_plan, segment_name=None):
+    """通知 details 只需要少量字段, 直接拼 dict 省掉 Pydantic 往返"""
+    return {
+        "id": segment_plan.id,
+        "plan_id": segment_plan.plan_id,
+        "segment": segment_name or segment_plan.segment.name,
+        "operate_time": segment_plan.operate_time,
+        "status": segment_plan.status,
+        "remarks": segment_plan.remarks,
+    }
+
+
+# 字段定位参数 -> 查询列, 代替重复的 if/elif 链
+_CLIENT_COLS = {
+    "id": Client.id,
+    "name": Client.name,
+    "phone_number": Client.phone_number,
+}
+
+_SEGMENT_COLS = {
+    "id": Segment.id,
+    "name": Segment.name,
+}
+
+
+_SEGMENT_PLAN_COLS = (
+    SegmentPlan.id,
+    SegmentPlan.plan_id,
+    SegmentPlan.segment_id,
+    SegmentPlan.operator_id,
+    SegmentPlan.operate_time,
+    SegmentPlan.status,
+    SegmentPlan.remarks,
+)
+
+_IMPLEMENTATION_COLS = (
+    OperationImplementationInformation.id,
+    OperationImplementationInformation.segment_plan_id,
+    OperationImplementationInformation.operation_id,
+    OperationImplementationInformation.status,
+    OperationImplementationInformation.image_filename,
+    OperationImplementationInformation.video_filename,
+    OperationImplementationInformation.operate_time,
+)
+
+
+@segment_router.post("/add_segment_plan", summary="添加环节种植计划")
+async def add_segment_plan(
+    background_tasks: BackgroundTasks,
+    plan_id: int = Body(...),
+    segment: str = Body(...),
+    segment_field_type: str = Body("id"),
+    operator: str = Body(...),
+    operator_field_type: str = Body("id"),
+    operate_time: Optional[str] = Body(None, examples=["2024-01-01 12:00:00"]),
+    remarks: Optional[str] = Body(None),
+):
+    with SessionLocal() as db:
+        seg_filter = _SEGMENT_COLS.get(segment_field_type, Segment.name) == (
+            int(segment) if segment_field_type == "id" else segment
+        )
+        cli_filter = _CLIENT_COLS.get(
+            operator_field_type, Client.phone_number
+        ) == (int(operator) if operator_field_type == "id" else operator)
+        # 计划/环节/操作人 三项校验合并为一次往返, 重复交给唯一约束
+        plan_ok, segment_id, segment_name, operator_id = db.execute(
+            select(
+                exists().where(Plan.id == plan_id),
+                select(Segment.id).where(seg_filter).limit(1).scalar_subquery(),
+                select(Segment.name).where(seg_filter).limit(1).scalar_subquery(),
+                select(Client.id).where(cli_filter).limit(1).scalar_subquery(),
+            )
+        ).one()
+        if not plan_ok:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "计划不存在"}
+            )
+        if segment_id is None:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节不存在"}
+            )
+        if operator_id is None:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "操作人不存在"}
+            )
+        operate_ts = _parse_ts(operate_time) if operate_time else datetime.now()
+        # 预查重 + INSERT 存在竞态窗口, 改为唯一约束上的 ON CONFLICT DO NOTHING
+        segment_plan_id = db.execute(
+            pg_insert(SegmentPlan)
+            .values(
+                plan_id=plan_id,
+                segment_id=segment_id,
+                operator_id=operator_id,
+                operate_time=operate_ts,
+                status="未开始",
+                remarks=remarks,
+            )
+            .on_conflict_do_nothing(index_elements=["plan_id", "segment_id"])
+            .returning(SegmentPlan.id)
+        ).scalar()
+        if segment_plan_id is None:
+            db.rollback()
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "该环节计划已存在"}
+            )
+        operation_ids = [
+            row[0]
+            for row in db.query(PlantOperate.id)
+            .filter(PlantOperate.segment_id == segment_id)
+            .all()
+        ]
+        if operation_ids:
+            # 一条多行 INSERT 代替逐条 flush
+            db.execute(
+                OperationImplementationInformation.__table__.insert(),
+                [
+                    {
+                        "segment_plan_id": segment_plan_id,
+                        "operation_id": operation_id,
+                        "status": "未开始",
+                    }
+                    for operation_id in operation_ids
+                ],
+            )
+        db.commit()
+        receiver_ids = _client_ids_for_plan(db, plan_id)
+        # 每个接收人的 details 相同, 只序列化一次
+        details = orjson.dumps(
+            {
+                "id": segment_plan_id,
+                "plan_id": plan_id,
+                "segment": segment_name,
+                "operate_time": operate_ts,
+                "status": "未开始",
+                "remarks": remarks,
+            },
+            default=str,
+        ).decode()
+        # 通知扇出放到响应之后的后台任务
+        background_tasks.add_task(
+            add_messages_bulk,
+            receiver_ids,
+            title="种植计划新增",
+            content=f"您订购的计划新增了环节[{segment_name}]的种植安排",
+            details=details,
+            message_type="segment_plan",
+        )
+        return ORJSONResponse(
+            status_code=200, content={"code": 0, "message": "添加成功"}
+        )
+
+
+@segment_router.get("/get_segment_plan", summary="获取环节种植计划列表")
+async def get_segment_plan(
+    plan_id: Optional[int] = Query(None),
+    cursor: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    # 只读列表走异步会话, 并发请求共享连接池而不阻塞事件循环
+    async with AsyncSessionLocal() as db:
+        stmt = select(*_SEGMENT_PLAN_COLS)
+        if plan_id is not None:
+            stmt = stmt.where(SegmentPlan.plan_id == plan_id)
+        if cursor is not None:
+            # 游标分页: 深翻页不再随 OFFSET 线性变慢
+            items = (
+                await db.execute(
+                    stmt.where(SegmentPlan.id < cursor)
+                    .order_by(SegmentPlan.id.desc())
+                    .limit(page_size)
+                )
+            ).mappings().all()
+            data = {
+                "items": [dict(row) for row in items],
+                "next_cursor": items[-1]["id"] if items else None,
+            }
+            return ORJSONResponse(
+                status_code=200,
+                content={"code": 0, "message": "查询成功", "data": data},
+            )
+        total = (
+            await db.execute(select(func.count()).select_from(stmt.subquery()))
+        ).scalar()
+        field = getattr(SegmentPlan, order_field)
+        items = (
+            await db.execute(
+                stmt.order_by(field.desc() if order == "desc" else field.asc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+        ).mappings().all()
+        data = {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "data": [dict(row) for row in items],
+        }
+        return ORJSONResponse(
+            status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+        )
+
+
+@segment_router.get("/get_operation_implementation", summary="获取操作实施信息列表")
+async def get_operation_implementation(
+    segment_plan_id: Optional[int] = Query(None),
+    cursor: Optional[int] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    order_field: str = Query("id"),
+    order: str = Query("desc"),
+):
+    async with AsyncSessionLocal() as db:
+        stmt = select(*_IMPLEMENTATION_COLS)
+        if segment_plan_id is not None:
+            stmt = stmt.where(
+                OperationImplementationInformation.segment_plan_id == segment_plan_id
+            )
+        if cursor is not None:
+            items = (
+                await db.execute(
+                    stmt.where(OperationImplementationInformation.id < cursor)
+                    .order_by(OperationImplementationInformation.id.desc())
+                    .limit(page_size)
+                )
+            ).mappings().all()
+            data = {
+                "items": [dict(row) for row in items],
+                "next_cursor": items[-1]["id"] if items else None,
+            }
+            return ORJSONResponse(
+                status_code=200,
+                content={"code": 0, "message": "查询成功", "data": data},
+            )
+        total = (
+            await db.execute(select(func.count()).select_from(stmt.subquery()))
+        ).scalar()
+        field = getattr(OperationImplementationInformation, order_field)
+        items = (
+            await db.execute(
+                stmt.order_by(field.desc() if order == "desc" else field.asc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+        ).mappings().all()
+        data = {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "data": [dict(row) for row in items],
+        }
+        return ORJSONResponse(
+            status_code=200, content={"code": 0, "message": "查询成功", "data": data}
+        )
+
+
+@segment_router.put("/update_segment_plan", summary="修改环节种植计划")
+async def update_segment_plan(
+    background_tasks: BackgroundTasks,
+    segment_plan_id: int = Body(...),
+    operator: Optional[str] = Body(None),
+    operator_field_type: str = Body("id"),
+    operate_time: Optional[str] = Body(None),
+    status: Optional[str] = Body(None),
+    remarks: Optional[str] = Body(None),
+):
+    with SessionLocal() as db:
+        segment_plan = (
+            db.query(SegmentPlan).filter(SegmentPlan.id == segment_plan_id).first()
+        )
+        if not segment_plan:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节计划不存在"}
+            )
+        if operator is not None:
+            cli_filter = _CLIENT_COLS.get(
+                operator_field_type, Client.phone_number
+            ) == (int(operator) if operator_field_type == "id" else operator)
+            operator_obj = db.query(Client).filter(cli_filter).first()
+            if not operator_obj:
+                return ORJSONResponse(
+                    status_code=200, content={"code": 1, "message": "操作人不存在"}
+                )
+            segment_plan.operator_id = operator_obj.id
+        if operate_time is not None:
+            segment_plan.operate_time = _parse_ts(operate_time)
+        if status is not None:
+            segment_plan.status = status
+        if remarks is not None:
+            segment_plan.remarks = remarks
+        db.commit()
+        receiver_ids = _client_ids_for_plan(db, segment_plan.plan_id)
+        details = orjson.dumps(
+            _segment_plan_brief(segment_plan), default=str
+        ).decode()
+        background_tasks.add_task(
+            add_messages_bulk,
+            receiver_ids,
+            title="种植计划变更",
+            content="您订购的计划的环节种植安排有更新",
+            details=details,
+            message_type="segment_plan",
+        )
+        return ORJSONResponse(
+            status_code=200, content={"code": 0, "message": "修改成功"}
+        )
+
+
+@segment_router.post("/upload_file", summary="上传操作实施图片/视频")
+async def upload_file(
+    background_tasks: BackgroundTasks,
+    implementation_id: int = Form(...),
+    operate_time: Optional[str] = Form(None, examples=["2024-01-01 12:00:00"]),
+    image: Optional[UploadFile] = File(None),
+    video: Optional[UploadFile] = File(None),
+):
+    with SessionLocal() as db:
+        implementation = (
+            db.query(OperationImplementationInformation)
+            .options(
+                joinedload(OperationImplementationInformation.segment_plan).joinedload(
+                    SegmentPlan.segment
+                ),
+                joinedload(OperationImplementationInformation.operation),
+                *_RAISELOAD_GUARD,
+            )
+            .filter(OperationImplementationInformation.id == implementation_id)
+            .first()
+        )
+        if not implementation:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "实施信息不存在"}
+            )
+        if image is not None:
+            if implementation.image_filename:
+                delete_image(implementation.image_filename)
+            implementation.image_filename = await save_upload_image(image)
+        if video is not None:
+            if implementation.video_filename:
+                delete_video(implementation.video_filename)
+            implementation.video_filename = await save_video(video)
+        implementation.operate_time = (
+            _parse_ts(operate_time) if operate_time else datetime.now()
+        )
+        implementation.status = "已完成"
+        if implementation.segment_plan.status == "未开始":
+            implementation.segment_plan.status = "进行中"
+        db.commit()
+        receiver_ids = _client_ids_for_plan(db, implementation.segment_plan.plan_id)
+        content = (
+            f"环节[{implementation.segment_plan.segment.name}]的操作"
+            f"[{implementation.operation.name}]有新的实施记录"
+        )
+        details = orjson.dumps(
+            {
+                "id": implementation.id,
+                "segment_plan_id": implementation.segment_plan_id,
+                "operation": implementation.operation.name,
+                "status": implementation.status,
+                "operate_time": implementation.operate_time,
+            },
+            default=str,
+        ).decode()
+        background_tasks.add_task(
+            add_messages_bulk,
+            receiver_ids,
+            title="实施信息上传",
+            content=content,
+            details=details,
+            message_type="implementation",
+        )
+        return ORJSONResponse(
+            status_code=200, content={"code": 0, "message": "上传成功"}
+        )
+
+
+@segment_router.delete("/delete_segment_plan", summary="删除环节种植计划")
+async def delete_segment_plan(
+    background_tasks: BackgroundTasks, segment_plan_id: int = Query(...)
+):
+    with SessionLocal() as db:
+        segment_plan = (
+            db.query(SegmentPlan)
+            .options(
+                selectinload(SegmentPlan.implementations),
+                joinedload(SegmentPlan.segment),
+                *_RAISELOAD_GUARD,
+            )
+            .filter(SegmentPlan.id == segment_plan_id)
+            .first()
+        )
+        if not segment_plan:
+            return ORJSONResponse(
+                status_code=200, content={"code": 1, "message": "环节计划不存在"}
+            )
+        plan_id = segment_plan.plan_id
+        segment_name = segment_plan.segment.name
+        details = orjson.dumps(
+            _segment_plan_brief(segment_plan, segment_name), default=str
+        ).decode()
+        filenames = [
+            (impl.image_filename, impl.video_filename)
+            for impl in segment_plan.implementations
+            if impl.image_filename or impl.video_filename
+        ]
+        # 两条批量 DELETE 代替逐行 ORM 删除, 文件清理挪到响应之后
+        db.execute(
+            OperationImplementationInformation.__table__.delete().where(
+                OperationImplementationInformation.segment_plan_id == segment_plan.id
+            )
+        )
+        db.execute(
+            SegmentPlan.__table__.delete().where(SegmentPlan.id == segment_plan.id)
+        )
+        db.commit()
+        if filenames:
+            background_tasks.add_task(_purge_media, filenames)
+        receiver_ids = _client_ids_for_plan(db, plan_id)
+        background_tasks.add_task(
+            add_messages_bulk,
+            receiver_ids,
+            title="种植计划取消",
+            content=f"环节[{segment_name}]的种植安排已取消",
+            details=details,
+            message_type="segment_plan",
+        )
+        return ORJSONResponse(
+            status_code=200, content={"code": 0, "message": "删除成功"}
+        )
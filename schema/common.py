@@ -0,0 +1,303 @@
+import base64
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import and_, func, or_, select, tuple_
+
+
+def transform_schema(schema, obj):
+    """ORM 对象转换为 JSON 可序列化的字典"""
+    return schema.model_validate(obj).model_dump(mode="json")
+
+
+def page_with_order(
+    schema, query, page=1, page_size=10, order_field="id", order="desc", count=True
+):
+    """统一分页排序, 返回 total + 当前页数据
+
+    count=False 时跳过整表 COUNT, 多取一行推出 has_next,
+    大表的列表页由两条查询降为一条。
+    """
+    model = query.column_descriptions[0]["entity"]
+    field = getattr(model, order_field)
+    ordered = query.order_by(field.desc() if order == "desc" else field.asc())
+    offset = (page - 1) * page_size
+    if count:
+        total = query.count()
+        objs = ordered.offset(offset).limit(page_size).all()
+        return {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "data": [transform_schema(schema, obj) for obj in objs],
+        }
+    objs = ordered.offset(offset).limit(page_size + 1).all()
+    has_next = len(objs) > page_size
+    return {
+        "page": page,
+        "page_size": page_size,
+        "has_next": has_next,
+        "data": [transform_schema(schema, obj) for obj in objs[:page_size]],
+    }
+
+
+async def page_with_order_async(
+    schema,
+    db,
+    stmt,
+    page=1,
+    page_size=10,
+    order_field="id",
+    order="desc",
+    count=True,
+):
+    """page_with_order 的 AsyncSession 版本, 语义一致
+
+    查询以 select() 语句传入, 执行交给调用方的异步会话 await,
+    事件循环在等库的时间里可以继续处理别的请求。
+    """
+    model = stmt.column_descriptions[0]["entity"]
+    field = getattr(model, order_field)
+    ordered = stmt.order_by(field.desc() if order == "desc" else field.asc())
+    offset = (page - 1) * page_size
+    if count:
+        total = await db.scalar(
+            select(func.count()).select_from(stmt.order_by(None).subquery())
+        )
+        objs = (await db.scalars(ordered.offset(offset).limit(page_size))).all()
+        return {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "data": [transform_schema(schema, obj) for obj in objs],
+        }
+    objs = (
+        await db.scalars(ordered.offset(offset).limit(page_size + 1))
+    ).all()
+    has_next = len(objs) > page_size
+    return {
+        "page": page,
+        "page_size": page_size,
+        "has_next": has_next,
+        "data": [transform_schema(schema, obj) for obj in objs[:page_size]],
+    }
+
+
+class InvalidCursorError(ValueError):
+    """客户端传入的游标无法解析"""
+
+
+def _decode_cursor(cursor):
+    """解码游标为 (排序列的值, id)
+
+    游标只是上一页末行的 "值|id" 做 base64, 不在服务端存状态。
+    值域为空串表示排序列是 NULL; 排序列可能是整型或时间,
+    逐个尝试还原, 都失败则按字符串比较。
+    游标来自客户端, 是不可信输入: 解不开按业务错误抛出,
+    由 main.py 的异常处理器统一回 code=1, 不落到 500。
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        last_value, last_id = raw.rsplit("|", 1)
+        last_id = int(last_id)
+    except ValueError as exc:
+        # binascii.Error / UnicodeDecodeError 都是 ValueError 子类
+        raise InvalidCursorError(cursor) from exc
+    if last_value == "":
+        return None, last_id
+    for convert in (int, float, datetime.fromisoformat):
+        try:
+            last_value = convert(last_value)
+            break
+        except ValueError:
+            continue
+    return last_value, last_id
+
+
+def _encode_cursor(last_value, last_id):
+    # 排序列为 NULL 时值域留空, 不能编码成字符串 "None"
+    raw = f"{'' if last_value is None else last_value}|{last_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _keyset_filter(field, model, last_value, last_id):
+    """按 (field DESC NULLS LAST, id DESC) 排序时游标之后的行
+
+    排序列可空 (ix_cp_effective_id/ix_cp_expired_id 对应的列都可空),
+    NULL 行排在末尾: 游标还在非空区时, 之后的行是元组更小的非空行
+    加整个 NULL 区; 游标已进 NULL 区时, 只剩同区里 id 更小的行。
+    元组比较里 NULL 不参与排序, 必须显式用 IS NULL 圈出来。
+    """
+    if last_value is None:
+        return and_(field.is_(None), model.id < last_id)
+    return or_(
+        tuple_(field, model.id) < (last_value, last_id), field.is_(None)
+    )
+
+
+def page_with_cursor(schema, query, cursor=None, page_size=10, order_field="id"):
+    """游标分页, 返回 data + next_cursor
+
+    与 page_with_order 的差别: 用 (order_field, id) keyset 过滤代替
+    OFFSET, 深页不再扫描丢弃跳过的行; 多取一行判断有无下一页,
+    省掉整表 COUNT。要求 (order_field, id) 上有复合索引。
+    """
+    model = query.column_descriptions[0]["entity"]
+    field = getattr(model, order_field)
+    if cursor:
+        last_value, last_id = _decode_cursor(cursor)
+        query = query.filter(_keyset_filter(field, model, last_value, last_id))
+    rows = (
+        query.order_by(field.desc().nullslast(), model.id.desc())
+        .limit(page_size + 1)
+        .all()
+    )
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_next:
+        last = rows[-1]
+        next_cursor = _encode_cursor(getattr(last, order_field), last.id)
+    return {
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "data": [transform_schema(schema, obj) for obj in rows],
+    }
+
+
+async def page_with_cursor_async(
+    schema, db, stmt, cursor=None, page_size=10, order_field="id"
+):
+    """page_with_cursor 的 AsyncSession 版本, 游标格式与同步版互通"""
+    model = stmt.column_descriptions[0]["entity"]
+    field = getattr(model, order_field)
+    if cursor:
+        last_value, last_id = _decode_cursor(cursor)
+        stmt = stmt.where(_keyset_filter(field, model, last_value, last_id))
+    rows = (
+        await db.scalars(
+            stmt.order_by(
+                field.desc().nullslast(), model.id.desc()
+            ).limit(page_size + 1)
+        )
+    ).all()
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_next:
+        last = rows[-1]
+        next_cursor = _encode_cursor(getattr(last, order_field), last.id)
+    return {
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "data": [transform_schema(schema, obj) for obj in rows],
+    }
+
+
+class PlanSegmentRelationshipSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    plan_id: int
+    segment_id: int
+    operator: Optional[str] = None
+    operate_date: Optional[datetime] = None
+    remark: Optional[str] = None
+    image_uri: Optional[str] = None
+    video_uri: Optional[str] = None
+
+
+class SegmentPlanSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    plan_id: int
+    segment_id: int
+    operator_id: Optional[int] = None
+    operate_time: Optional[datetime] = None
+    status: Optional[str] = None
+    remarks: Optional[str] = None
+
+
+class OperationImplementBaseSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    segment_plan_id: int
+    operation_id: int
+    status: Optional[str] = None
+    image_filename: Optional[str] = None
+    video_filename: Optional[str] = None
+    operate_time: Optional[datetime] = None
+
+
+class PlanSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    year: int
+    batch: int
+    location_id: int
+    total_material: Optional[float] = None
+    create_people: Optional[str] = None
+    create_time: Optional[datetime] = None
+
+
+class PlantPlanSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    plan_id: int
+    segment_id: int
+    operator_id: Optional[int] = None
+    operation_date: Optional[datetime] = None
+    remarks: Optional[str] = None
+
+
+class ClientSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    phone_number: Optional[str] = None
+
+
+class PrivilegeSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    privilege_type: Optional[str] = None
+    description: Optional[str] = None
+    deleted: Optional[bool] = None
+    effective_time: Optional[datetime] = None
+    expired_time: Optional[datetime] = None
+    create_time: Optional[datetime] = None
+
+
+class ClientPrivilegeRelationSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    client_id: int
+    privilege_id: int
+    privilege_number: Optional[str] = None
+    effective_time: Optional[datetime] = None
+    expired_date: Optional[datetime] = None
+    amount: Optional[int] = None
+    used_amount: Optional[int] = None
+    unused_amount: Optional[int] = None
+    create_time: Optional[datetime] = None
+    privilege: Optional[PrivilegeSchema] = None
+    client: Optional[ClientSchema] = None
+
+
+class SegmentFileSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    segment_id: int
+    filename: str
+    file_type: Optional[str] = None
+    upload_time: Optional[datetime] = None
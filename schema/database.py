@@ -0,0 +1,36 @@
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from config import ASYNC_DATABASE_URL, DATABASE_URL, SQLALCHEMY_NULLPOOL
+
+# 显式配置连接池, 避免高并发下连接风暴;
+# 走 PgBouncer 时 (SQLALCHEMY_NULLPOOL=1) 改用 NullPool, 池化交给外部
+_POOL_KWARGS = (
+    {"poolclass": NullPool}
+    if SQLALCHEMY_NULLPOOL
+    else {
+        "pool_size": 20,
+        "max_overflow": 40,
+        "pool_timeout": 30,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+    }
+)
+
+engine = create_engine(DATABASE_URL, query_cache_size=1200, **_POOL_KWARGS)
+
+SessionLocal = scoped_session(
+    sessionmaker(
+        bind=engine, autoflush=False, autocommit=False, expire_on_commit=False
+    )
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, query_cache_size=1200, **_POOL_KWARGS
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+Base = declarative_base()
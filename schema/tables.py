@@ -0,0 +1,295 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.orm import relationship
+
+from schema.database import Base, engine
+
+_IS_PG = engine.dialect.name == "postgresql"
+
+
+class Location(Base):
+    """种植基地"""
+
+    __tablename__ = "location"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(64), nullable=False, unique=True)
+    address = Column(String(256), nullable=True)
+
+
+class Plan(Base):
+    """种植计划"""
+
+    __tablename__ = "plan"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    year = Column(Integer, nullable=False)
+    batch = Column(Integer, nullable=False)
+    location_id = Column(Integer, ForeignKey("location.id"), nullable=False)
+    total_material = Column(Float, nullable=True)
+    create_people = Column(String(64), nullable=True)
+    create_time = Column(DateTime, default=datetime.now)
+
+
+class Segment(Base):
+    """种植环节"""
+
+    __tablename__ = "segment"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(64), nullable=False, unique=True)
+
+    operations = relationship(
+        "PlantOperate", back_populates="segment", cascade="all, delete-orphan"
+    )
+
+
+class PlantOperate(Base):
+    """环节下的操作步骤"""
+
+    __tablename__ = "plant_operate"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    segment_id = Column(Integer, ForeignKey("segment.id"), nullable=False)
+    name = Column(String(64), nullable=False)
+    index = Column(Integer, nullable=False, default=0)
+
+    segment = relationship("Segment", back_populates="operations")
+
+
+class PlanSegmentRelationship(Base):
+    """计划与环节的执行记录"""
+
+    __tablename__ = "plan_segment_relationship"
+    __table_args__ = (
+        UniqueConstraint("plan_id", "segment_id", name="uq_plan_segment"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    plan_id = Column(Integer, ForeignKey("plan.id"), nullable=False)
+    segment_id = Column(Integer, ForeignKey("segment.id"), nullable=False)
+    operator = Column(String(64), nullable=True)
+    operate_date = Column(DateTime, nullable=True)
+    remark = Column(String(256), nullable=True)
+    image_uri = Column(String(128), nullable=True)
+    video_uri = Column(String(128), nullable=True)
+
+
+class Client(Base):
+    """客户"""
+
+    __tablename__ = "client"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(64), nullable=False)
+    phone_number = Column(String(32), nullable=True)
+
+
+class Order(Base):
+    """客户订单"""
+
+    __tablename__ = "order"
+    __table_args__ = (Index("ix_order_plan_client", "plan_id", "client_id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    client_id = Column(Integer, ForeignKey("client.id"), nullable=False)
+    plan_id = Column(Integer, ForeignKey("plan.id"), nullable=False)
+    create_time = Column(DateTime, default=datetime.now)
+
+
+class Message(Base):
+    """站内通知消息"""
+
+    __tablename__ = "message"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    receiver_id = Column(Integer, ForeignKey("client.id"), nullable=False)
+    title = Column(String(64), nullable=False)
+    content = Column(String(256), nullable=True)
+    details = Column(String(1024), nullable=True)
+    message_type = Column(String(32), nullable=True)
+    read = Column(Boolean, default=False)
+    create_time = Column(DateTime, default=datetime.now)
+
+
+class SegmentPlan(Base):
+    """环节种植计划"""
+
+    __tablename__ = "segment_plan"
+    __table_args__ = (
+        UniqueConstraint("plan_id", "segment_id", name="uq_segment_plan"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    plan_id = Column(Integer, ForeignKey("plan.id"), nullable=False)
+    segment_id = Column(Integer, ForeignKey("segment.id"), nullable=False)
+    operator_id = Column(Integer, ForeignKey("client.id"), nullable=True)
+    operate_time = Column(DateTime, nullable=True)
+    status = Column(String(32), default="未开始")
+    remarks = Column(String(256), nullable=True)
+
+    segment = relationship("Segment")
+    operator = relationship("Client")
+    implementations = relationship(
+        "OperationImplementationInformation",
+        back_populates="segment_plan",
+        cascade="all, delete-orphan",
+    )
+
+
+class OperationImplementationInformation(Base):
+    """操作步骤实施信息"""
+
+    __tablename__ = "operation_implementation_information"
+    __table_args__ = (
+        Index("ix_oii_segplan", "segment_plan_id"),
+        Index("ix_oii_op", "operation_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    segment_plan_id = Column(
+        Integer, ForeignKey("segment_plan.id"), nullable=False
+    )
+    operation_id = Column(Integer, ForeignKey("plant_operate.id"), nullable=False)
+    status = Column(String(32), default="未开始")
+    image_filename = Column(String(128), nullable=True)
+    video_filename = Column(String(128), nullable=True)
+    operate_time = Column(DateTime, nullable=True)
+
+    segment_plan = relationship("SegmentPlan", back_populates="implementations")
+    operation = relationship("PlantOperate")
+
+
+class PlantPlan(Base):
+    """计划环节执行安排"""
+
+    __tablename__ = "plant_plan"
+    __table_args__ = (Index("ix_plant_plan_segment", "segment_id", "plan_id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    plan_id = Column(Integer, ForeignKey("plan.id"), nullable=False)
+    segment_id = Column(Integer, ForeignKey("segment.id"), nullable=False)
+    operator_id = Column(Integer, ForeignKey("client.id"), nullable=True)
+    operation_date = Column(DateTime, nullable=True)
+    remarks = Column(String(256), nullable=True)
+
+    plan = relationship("Plan")
+    segment = relationship("Segment")
+    operator = relationship("Client")
+
+
+class Privilege(Base):
+    """权益"""
+
+    __tablename__ = "privilege"
+    __table_args__ = (
+        # 按名称查有效权益是发放/创建的热路径; PG 上用部分索引, 只收录
+        # 未删除的行, 体积更小; sqlite 忽略 where 子句退化为普通索引
+        Index(
+            "ix_privilege_name_active",
+            "name",
+            postgresql_where=text("deleted = false"),
+        ),
+        # 列表接口固定按 deleted + 过期时间过滤, 给这对谓词配复合索引
+        Index("ix_privilege_deleted_expired", "deleted", "expired_time"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(64), nullable=False)
+    privilege_type = Column(String(32), nullable=True)
+    description = Column(String(256), nullable=True)
+    deleted = Column(Boolean, default=False)
+    effective_time = Column(DateTime, nullable=True)
+    expired_time = Column(DateTime, nullable=True)
+    create_time = Column(DateTime, default=datetime.now)
+
+
+class ClientPrivilege(Base):
+    """客户持有的权益"""
+
+    __tablename__ = "client_privilege"
+    __table_args__ = (
+        # 游标分页按 (排序列, id) 做 keyset 查找, 需要对应的复合索引
+        Index("ix_cp_effective_id", "effective_time", "id"),
+        Index("ix_cp_expired_id", "expired_date", "id"),
+        # 列表接口按客户 + 到期时间、核销状态组合过滤, 对齐实际谓词
+        Index("ix_cp_client_expired", "client_id", "expired_date"),
+        Index("ix_cp_use_status", "unused_amount", "used_amount", "amount"),
+        # 发放接口按 (privilege_id, client_id IN ...) 找已有行,
+        # 核销/列表也常按这对外键组合过滤
+        Index("ix_cp_client_privilege", "client_id", "privilege_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    client_id = Column(Integer, ForeignKey("client.id"), nullable=False)
+    privilege_id = Column(Integer, ForeignKey("privilege.id"), nullable=False)
+    # 生产 PG 由库端默认生成编号, 插入行时不再每行跑一次 Python uuid4
+    # (背后是一次 urandom 系统调用); 开发 sqlite 没有 gen_random_uuid,
+    # 退回客户端默认
+    privilege_number = Column(
+        String(64),
+        nullable=True,
+        server_default=text("replace(gen_random_uuid()::text, '-', '')")
+        if _IS_PG
+        else None,
+        default=None if _IS_PG else (lambda: uuid.uuid4().hex),
+    )
+    effective_time = Column(DateTime, nullable=True)
+    expired_date = Column(DateTime, nullable=True)
+    amount = Column(Integer, default=0)
+    used_amount = Column(Integer, default=0)
+    unused_amount = Column(Integer, default=0)
+    create_time = Column(DateTime, default=datetime.now)
+
+    client = relationship("Client")
+    privilege = relationship("Privilege")
+    usages = relationship(
+        "PrivilegeUsage",
+        back_populates="client_privilege",
+        cascade="all, delete-orphan",
+    )
+
+
+class PrivilegeUsage(Base):
+    """权益核销记录"""
+
+    __tablename__ = "privilege_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    client_privilege_id = Column(
+        Integer, ForeignKey("client_privilege.id"), nullable=False
+    )
+    privilege_id = Column(Integer, ForeignKey("privilege.id"), nullable=False)
+    client_id = Column(Integer, ForeignKey("client.id"), nullable=False)
+    used_amount = Column(Integer, default=1)
+    used_time = Column(DateTime, default=datetime.now)
+    remarks = Column(String(256), nullable=True)
+
+    client_privilege = relationship("ClientPrivilege", back_populates="usages")
+
+
+class SegmentFile(Base):
+    """环节资料文件"""
+
+    __tablename__ = "segment_file"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    segment_id = Column(Integer, ForeignKey("segment.id"), nullable=False)
+    filename = Column(String(128), nullable=False)
+    file_type = Column(String(16), nullable=True)
+    upload_time = Column(DateTime, default=datetime.now)
+
+    segment = relationship("Segment", lazy="selectin")
@@ -0,0 +1,42 @@
+import os
+
+os.environ["DATABASE_URL"] = "sqlite:///./test_grain_master.db"
+os.environ["ASYNC_DATABASE_URL"] = "sqlite+aiosqlite:///./test_grain_master.db"
+
+from fastapi.testclient import TestClient
+
+import main
+from schema.database import Base, SessionLocal, engine
+from schema.tables import Location
+
+
+def setup_module():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Location(name="东山基地"))
+    db.commit()
+    SessionLocal.remove()
+
+
+def teardown_module():
+    engine.dispose()
+    if os.path.exists("./test_grain_master.db"):
+        os.remove("./test_grain_master.db")
+
+
+def test_get_plans_hot_path():
+    """默认参数的列表请求走快路径, 能正常返回数据"""
+    client = TestClient(main.app)
+    resp = client.post(
+        "/plan/add_plan",
+        json={"year": 2026, "batch": 1, "location": "东山基地"},
+    )
+    assert resp.json()["code"] == 0
+
+    resp = client.get("/plan/get_plans")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["code"] == 0
+    assert body["data"]["total"] == 1
+    assert body["data"]["data"][0]["year"] == 2026
@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import hashlib
+import os
+import uuid
+
+import aiofiles
+
+from config import FILE_DIR, IMAGE_DIR, VIDEO_DIR
+
+os.makedirs(IMAGE_DIR, exist_ok=True)
+os.makedirs(VIDEO_DIR, exist_ok=True)
+os.makedirs(FILE_DIR, exist_ok=True)
+
+
+def save_image(image):
+    """保存 base64 编码的图片, 返回文件名"""
+    filename = uuid.uuid4().hex + ".jpg"
+    content = base64.b64decode(image)
+    with open(os.path.join(IMAGE_DIR, filename), "wb") as f:
+        f.write(content)
+    return filename
+
+
+async def save_video(video):
+    """流式保存上传的视频文件, 返回文件名
+
+    1MiB 一块异步写盘, 内存占用与文件大小无关; 边写边算 sha256,
+    不用二次读取就能得到内容寻址的文件名。
+    """
+    suffix = os.path.splitext(video.filename)[1] or ".mp4"
+    hasher = hashlib.sha256()
+    tmp_path = os.path.join(VIDEO_DIR, uuid.uuid4().hex + ".part")
+    async with aiofiles.open(tmp_path, "wb") as dst:
+        while chunk := await video.read(1 << 20):
+            hasher.update(chunk)
+            await dst.write(chunk)
+    filename = hasher.hexdigest() + suffix
+    await asyncio.to_thread(os.replace, tmp_path, os.path.join(VIDEO_DIR, filename))
+    return filename
+
+
+async def save_upload_image(image):
+    """流式保存 multipart 上传的图片, 返回文件名"""
+    suffix = os.path.splitext(image.filename or "")[1] or ".jpg"
+    hasher = hashlib.sha256()
+    tmp_path = os.path.join(IMAGE_DIR, uuid.uuid4().hex + ".part")
+    async with aiofiles.open(tmp_path, "wb") as dst:
+        while chunk := await image.read(1 << 20):
+            hasher.update(chunk)
+            await dst.write(chunk)
+    filename = hasher.hexdigest() + suffix
+    await asyncio.to_thread(os.replace, tmp_path, os.path.join(IMAGE_DIR, filename))
+    return filename
+
+
+def delete_image(filename):
+    path = os.path.join(IMAGE_DIR, filename)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def delete_video(filename):
+    path = os.path.join(VIDEO_DIR, filename)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+async def save_segment_file(file):
+    """流式保存环节资料文件, 返回文件名
+
+    与图片/视频一样 1MiB 一块异步写盘, 大文件不再整体读进内存。
+    """
+    suffix = os.path.splitext(file.filename or "")[1]
+    filename = uuid.uuid4().hex + suffix
+    async with aiofiles.open(os.path.join(FILE_DIR, filename), "wb") as dst:
+        while chunk := await file.read(1 << 20):
+            await dst.write(chunk)
+    return filename
+
+
+def delete_segment_file(filename):
+    path = os.path.join(FILE_DIR, filename)
+    if os.path.exists(path):
+        os.remove(path)